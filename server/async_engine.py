@@ -0,0 +1,157 @@
+import asyncio
+import socket
+import threading
+import time
+
+import receiver
+
+class TimedSocket(socket.socket):
+    """
+    UDP socket recording how long its latest `recvfrom` took (ns). The selector event loop reads every datagram
+    with `recvfrom` right before `datagram_received`, which reports it as the `receive` stage like the threaded
+    receiver.
+    """
+
+    read_time = 0
+
+    def recvfrom(self, *args):
+        start = time.perf_counter_ns()
+        try:
+            return super().recvfrom(*args)
+        finally:
+            self.read_time = time.perf_counter_ns() - start
+
+class IdleTimer:
+    """
+    Calls `callback` once `timeout` seconds have passed without a call to `touch`. Touching only records
+    the time of the packet; the pending timer re-arms itself for the remaining time when it fires early,
+    so a steady packet stream costs one timer per timeout period instead of one per packet.
+    """
+
+    def __init__(self, loop, timeout, callback):
+        self.loop     = loop
+        self.timeout  = timeout
+        self.callback = callback
+        self.last     = 0
+        self.handle   = None
+
+    def touch(self):
+        self.last = self.loop.time()
+        if self.handle is None:
+            self.handle = self.loop.call_at(self.last + self.timeout, self.expire)
+
+    def expire(self):
+        deadline = self.last + self.timeout
+        if self.loop.time() < deadline:
+            self.handle = self.loop.call_at(deadline, self.expire)
+        else:
+            self.handle = None
+            self.callback()
+
+    def cancel(self):
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+
+class SensorProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def datagram_received(self, data, addr):
+        self.engine.datagram_received(data, addr)
+
+    def error_received(self, exc):
+        # ICMP port unreachable (WSAECONNRESET) and oversized datagrams (WSAEMSGSIZE) are reported here
+        if isinstance(exc, ConnectionResetError):
+            self.engine.resets += 1
+        elif getattr(exc, 'winerror', None) == receiver.WSAEMSGSIZE:
+            self.engine.truncated += 1
+        else:
+            self.engine.errors += 1
+
+class AsyncioEngine:
+    """
+    Ingestion engine running an asyncio `DatagramProtocol` on a background event loop. The idle timeouts
+    of every client session (action release, waiting for data and disconnection) are scheduled timers that
+    are reset by incoming packets, replacing the polling `action_controller` thread.
+    """
+
+    def __init__(self, server, sock, rcvbuf=None):
+        self.server = server
+        self.sock   = sock
+
+        if rcvbuf:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        self.rcvbuf = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        self.sock.setblocking(False)
+
+        # A selector loop on every platform, the proactor loop of Windows does not read through `recvfrom`
+        self.loop   = asyncio.SelectorEventLoop()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+        self.timers = {} # Idle timers of each client session, keyed by address
+
+        self.received       = 0
+        self.truncated      = 0
+        self.malformed      = 0
+        self.kernel_dropped = 0
+        self.resets         = 0
+        self.errors         = 0
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self.loop.create_datagram_endpoint(lambda: SensorProtocol(self), sock=self.sock))
+        self.loop.run_forever()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def datagram_received(self, data, addr):
+        self.received += 1
+        if self.server.metrics is not None:
+            self.server.metrics.observe('receive', getattr(self.sock, 'read_time', 0))
+        self.server.handle_batch([(data, addr)], time.monotonic_ns())
+
+        session = self.server.sessions.get(addr)
+        if session is None:
+            return
+        timers = self.timers.get(addr)
+        if timers is None:
+            timers = self.timers[addr] = self.create_timers(session)
+        # The release timeout follows the session's measured packet interval
+        timers[0].timeout = session.release_timeout
+        for timer in timers:
+            timer.touch()
+
+    def create_timers(self, session):
+        server = self.server
+
+        def expire():
+            for timer in self.timers.pop(session.address, ()):
+                timer.cancel()
+            server.disconnect(session)
+
+        return (IdleTimer(self.loop, session.release_timeout,   lambda: server.release_interaction(session)),
+                IdleTimer(self.loop, server.WAITING_TIMEOUT,    lambda: server.mark_waiting(session)),
+                IdleTimer(self.loop, server.DISCONNECT_TIMEOUT, expire))
+
+    @property
+    def dropped(self):
+        return self.truncated + self.malformed + self.kernel_dropped
+
+    def stats(self):
+        """
+        Returns a snapshot of the receive counters.
+        """
+        return {'received'       : self.received,
+                'truncated'      : self.truncated,
+                'malformed'      : self.malformed,
+                'kernel_dropped' : self.kernel_dropped,
+                'dropped'        : self.dropped,
+                'resets'         : self.resets,
+                'errors'         : self.errors,
+                'rcvbuf'         : self.rcvbuf}
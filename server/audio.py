@@ -0,0 +1,141 @@
+import threading
+import time
+
+class PycawEndpoint:
+    """
+    Default speaker endpoint of Windows, accessed through PyCAW. Every call is a cross-process COM round trip.
+    """
+
+    def __init__(self):
+        from ctypes import cast, POINTER
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+        self.devices   = AudioUtilities.GetSpeakers()
+        self.interface = self.devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        self.volume    = cast(self.interface, POINTER(IAudioEndpointVolume))
+
+    def get_range(self):
+        minimum, maximum, _ = self.volume.GetVolumeRange()
+        return minimum, maximum
+
+    def get_level(self):
+        return self.volume.GetMasterVolumeLevel()
+
+    def set_level(self, level):
+        self.volume.SetMasterVolumeLevel(level, None)
+
+    def get_mute(self):
+        return bool(self.volume.GetMute())
+
+    def set_mute(self, mute):
+        self.volume.SetMute(int(mute), None)
+
+class FakeEndpoint:
+    """
+    In-memory audio endpoint with the same interface as `PycawEndpoint`. It counts the calls made to it and
+    can simulate the cost of a round trip, to test and benchmark the volume logic without Windows audio.
+    """
+
+    def __init__(self, minimum=-65.25, maximum=0.0, level=-20.0, mute=False, delay=0.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.level   = level
+        self.mute    = mute
+        self.delay   = delay
+        self.calls   = {'get_range': 0, 'get_level': 0, 'set_level': 0, 'get_mute': 0, 'set_mute': 0}
+
+    def call(self, name):
+        self.calls[name] += 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def get_range(self):
+        self.call('get_range')
+        return self.minimum, self.maximum
+
+    def get_level(self):
+        self.call('get_level')
+        return self.level
+
+    def set_level(self, level):
+        self.call('set_level')
+        self.level = level
+
+    def get_mute(self):
+        self.call('get_mute')
+        return self.mute
+
+    def set_mute(self, mute):
+        self.call('set_mute')
+        self.mute = mute
+
+class CachedVolume:
+    """
+    Master volume with the endpoint state cached locally. The range is read once, the level and mute state
+    are tracked after every change and only read back from the endpoint after `idle_interval` seconds without
+    a change, every `resync_interval` seconds, or after `invalidate`. The steps of a held gesture cost a single
+    set call each, and the first step of a gesture always starts from the endpoint's current level.
+
+    Changes made by someone else (the system mixer, media keys) while the volume is being changed are only seen
+    at the next resync, at most `resync_interval` seconds later, and the steps until then start from the cached
+    level. The endpoint's change notifications are not used, Windows also sends them for our own changes.
+    """
+
+    def __init__(self, endpoint, resync_interval=5.0, idle_interval=1.0):
+        self.endpoint        = endpoint
+        self.resync_interval = resync_interval
+        self.idle_interval   = idle_interval
+        self.lock            = threading.Lock()
+
+        self.minimum, self.maximum = self.endpoint.get_range()
+        self.resync()
+        self.used_at = self.synced_at # Monotonic time (sec) of the latest change
+
+    def resync(self):
+        """
+        Read the current level and mute state back from the endpoint.
+        """
+        self.level     = self.endpoint.get_level()
+        self.muted     = self.endpoint.get_mute()
+        self.synced_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        Force a resync before the next change, the endpoint was changed by someone else.
+        """
+        self.synced_at = float('-inf')
+
+    def refresh(self):
+        now = time.monotonic()
+        if now - self.synced_at >= self.resync_interval or now - self.used_at >= self.idle_interval:
+            self.resync()
+        self.used_at = now
+
+    def step(self, delta):
+        """
+        Change the volume by `delta` dB, clamped to the endpoint's range. A burst of coalesced steps
+        is passed as one delta and results in one set call.
+
+        Parameters:
+        -----------
+            delta (`float`): Change in dB, negative to decrease.
+
+        Returns:
+        --------
+            level (`float`): New volume level in dB.
+        """
+        with self.lock:
+            self.refresh()
+            level = min(self.maximum, max(self.minimum, self.level + delta))
+            if level != self.level:
+                self.endpoint.set_level(level)
+                self.level = level
+            return level
+
+    def toggle_mute(self):
+        with self.lock:
+            self.refresh()
+            self.muted = not self.muted
+            self.endpoint.set_mute(self.muted)
+            return self.muted
@@ -0,0 +1,108 @@
+import subprocess
+import sys
+import threading
+import time
+
+import audio
+
+class OutputBackend:
+    """
+    Interface between the server's action functions and the operating system. A backend presses keys and
+    changes the master volume; everything platform specific is imported when the backend is created.
+    """
+
+    def key(self, name, count=1):
+        """
+        Press and release a key `count` times, named as in the `keyboard` module (space, left, right, up, down,
+        enter, esc, or a combination such as shift+right).
+        """
+        raise NotImplementedError
+
+    def volume_step(self, delta):
+        """
+        Change the master volume by `delta` dB.
+        """
+        raise NotImplementedError
+
+    def toggle_mute(self):
+        raise NotImplementedError
+
+class WindowsBackend(OutputBackend):
+    """
+    Keys through the `keyboard` module and volume through PyCAW, with the endpoint state cached.
+    """
+
+    def __init__(self):
+        import keyboard
+        self.keyboard = keyboard
+        self.volume   = audio.CachedVolume(audio.PycawEndpoint())
+
+    def key(self, name, count=1):
+        for _ in range(count):
+            self.keyboard.send(name, do_press=True, do_release=True)
+
+    def volume_step(self, delta):
+        self.volume.step(delta)
+
+    def toggle_mute(self):
+        self.volume.toggle_mute()
+
+class LinuxBackend(OutputBackend):
+    """
+    Keys through xdotool and volume through PulseAudio's pactl (also provided by PipeWire).
+    """
+
+    KEYS = {"space": "space", "left": "Left", "right": "Right", "up": "Up", "down": "Down", "enter": "Return", "esc": "Escape",
+            "shift+left": "shift+Left", "shift+right": "shift+Right"}
+
+    def run(self, *command):
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+    def key(self, name, count=1):
+        # Repeated presses are made by a single xdotool process
+        self.run("xdotool", "key", "--repeat", str(count), "--delay", "0", self.KEYS.get(name, name))
+
+    def volume_step(self, delta):
+        self.run("pactl", "set-sink-volume", "@DEFAULT_SINK@", "{:+.1f}dB".format(delta))
+
+    def toggle_mute(self):
+        self.run("pactl", "set-sink-mute", "@DEFAULT_SINK@", "toggle")
+
+class RecordingBackend(OutputBackend):
+    """
+    Keeps every action in memory as (monotonic time in ns, kind, value) instead of touching the system.
+    Used for headless benchmarks of the packet to action pipeline and for tests.
+    """
+
+    def __init__(self):
+        self.lock    = threading.Lock()
+        self.actions = []
+
+    def record(self, kind, value):
+        with self.lock:
+            self.actions.append((time.monotonic_ns(), kind, value))
+
+    def key(self, name, count=1):
+        for _ in range(count):
+            self.record('key', name)
+
+    def volume_step(self, delta):
+        self.record('volume', delta)
+
+    def toggle_mute(self):
+        self.record('mute', None)
+
+    def clear(self):
+        with self.lock:
+            self.actions = []
+
+BACKENDS = {'windows': WindowsBackend, 'linux': LinuxBackend, 'recording': RecordingBackend}
+
+def default_backend():
+    return 'windows' if sys.platform == 'win32' else 'linux'
+
+def create(name=None):
+    """
+    Create an output backend by name, the platform's default when None.
+    """
+    return BACKENDS[name or default_backend()]()
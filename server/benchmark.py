@@ -0,0 +1,117 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import time
+
+import core
+import loadgen
+
+# Keys identifying a scenario, results of runs with the same values are compared
+SCENARIO = ('engine', 'phones', 'remote_phones', 'rate', 'jitter', 'loss', 'binary', 'duration')
+
+def generate(port, scenario):
+    phones = loadgen.create_phones(scenario['phones'], scenario['remote_phones'], scenario['rate'], scenario['jitter'],
+                                   scenario['loss'], scenario['binary'], seed=0)
+    return loadgen.run(phones, ('127.0.0.1', port), scenario['duration'])
+
+def run_scenario(scenario):
+    """
+    Run the server in this process against the load generator in a child process and measure it.
+
+    Every region is mapped to Volume+ on the recording backend, so every layout packet of a held gesture results in
+    an action. The latency is taken from the server's end to end histogram, from the socket read to the end of the action.
+
+    Parameters:
+    -----------
+        scenario (`dict`): Values of the `SCENARIO` keys.
+
+    Returns:
+    --------
+        result (`dict`): The scenario with its packets per second, drop rate, action count and latencies.
+    """
+    server = core.ControlServer('127.0.0.1', 0, engine=scenario['engine'], backend='recording', active=True, metrics_enabled=True)
+    server.settings = {key: {'Interaction': 'Volume+', 'Type': 'Constant'} for key in server.settings}
+    server.compile_dispatch()
+    server.start()
+
+    with multiprocessing.Pool(1) as pool:
+        totals = pool.apply(generate, (server.s.getsockname()[1], scenario))
+
+    # Let the server drain its socket and action queue before reading the counters
+    time.sleep(0.5)
+    while server.executor.depth:
+        time.sleep(0.01)
+    server.shutdown()
+
+    received   = server.receiver.received
+    dropped    = totals['sent'] - received + server.receiver.malformed
+    end_to_end = server.metrics.histograms['end_to_end']
+    return dict(scenario,
+                sent           = totals['sent'],
+                received       = received,
+                pps            = round(received / totals['duration'], 1),
+                drop_rate      = round(dropped / totals['sent'], 6) if totals['sent'] else 0.0,
+                kernel_dropped = server.receiver.kernel_dropped,
+                actions        = server.executor.executed,
+                p50_ms         = round(end_to_end.quantile(0.5) / 1e6, 3),
+                p99_ms         = round(end_to_end.quantile(0.99) / 1e6, 3),
+                max_ms         = round(end_to_end.max / 1e6, 3))
+
+def revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as results_file:
+        return [json.loads(line) for line in results_file if line.strip()]
+
+def previous_result(results, result):
+    for previous in reversed(results):
+        if all(previous.get(key) == result[key] for key in SCENARIO):
+            return previous
+    return None
+
+def report(result, previous):
+    line = (result['engine'].ljust(9) + str(result['phones']).rjust(4) + "+" + str(result['remote_phones']).ljust(3) +
+            str(result['pps']).rjust(10) + " pps" + str(round(result['drop_rate'] * 100, 2)).rjust(8) + " % dropped" +
+            str(result['p50_ms']).rjust(9) + " ms p50" + str(result['p99_ms']).rjust(9) + " ms p99")
+    if previous is not None:
+        line += ("   (was " + str(previous['pps']) + " pps, " + str(previous['p99_ms']) + " ms p99 at " +
+                 str(previous.get('revision')) + ")")
+    print(line)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the server's throughput and packet to action latency")
+    parser.add_argument('--engine', nargs='+', choices=['threaded', 'asyncio'], default=['threaded', 'asyncio'], help="Engines to benchmark")
+    parser.add_argument('--phones', type=int, nargs='+', default=[1, 8, 32], help="Numbers of layout phones to benchmark")
+    parser.add_argument('--remote-phones', type=int, default=0, help="Number of remote phones added to every run")
+    parser.add_argument('--rate', type=float, default=200.0, help="Packets per second of each phone")
+    parser.add_argument('--jitter', type=float, default=0.1, help="Random variation of the packet interval, as a fraction of it")
+    parser.add_argument('--loss', type=float, default=0.0, help="Probability of the generator dropping a packet")
+    parser.add_argument('--binary', action='store_true', help="Send binary layout packets instead of CSV text")
+    parser.add_argument('--duration', type=float, default=5.0, help="Seconds per run")
+    parser.add_argument('--output', default='./reports/benchmarks/results.jsonl', help="File the results are appended to")
+    parser.add_argument('--no-save', action='store_true', help="Only print the results")
+    args = parser.parse_args()
+
+    results = load_results(args.output)
+    info    = {'time': time.strftime("%Y%m%d%H%M%S"), 'revision': revision(), 'python': platform.python_version(), 'platform': platform.platform()}
+
+    for engine in args.engine:
+        for phones in args.phones:
+            scenario = {'engine': engine, 'phones': phones, 'remote_phones': args.remote_phones, 'rate': args.rate,
+                        'jitter': args.jitter, 'loss': args.loss, 'binary': args.binary, 'duration': args.duration}
+            result = dict(info, **run_scenario(scenario))
+            report(result, previous_result(results, result))
+
+            if not args.no_save:
+                os.makedirs(os.path.dirname(args.output), exist_ok=True)
+                with open(args.output, 'a') as results_file:
+                    results_file.write(json.dumps(result) + "\n")
@@ -0,0 +1,80 @@
+import queue
+
+class GuiBridge:
+    """
+    Thread-safe bridge between the ingestion threads and the Tk main loop. Calls posted from any thread
+    are queued and run by the main loop every `interval` milliseconds, so widgets are only touched from
+    the thread that owns them.
+    """
+
+    def __init__(self, interval=20):
+        self.interval = interval
+        self.window   = None
+        self.calls    = queue.SimpleQueue()
+
+    def attach(self, window):
+        """
+        Start draining posted calls from the main loop of `window`.
+        """
+        self.window = window
+        self.window.after(self.interval, self.drain)
+
+    def post(self, function, *args):
+        """
+        Queue `function(*args)` to run on the Tk main loop. Calls are dropped while no window is attached.
+        """
+        if self.window is not None:
+            self.calls.put((function, args))
+
+    def drain(self):
+        try:
+            while True:
+                function, args = self.calls.get_nowait()
+                function(*args)
+        except queue.Empty:
+            pass
+        self.window.after(self.interval, self.drain)
+
+class PollingView:
+    """
+    Throttled view of values published by the ingestion threads. Publishing only replaces the latest value
+    of a slot, without any Tk call. The main loop polls the slots `rate` times per second, renders the ones
+    published since the last poll and sets only the variables whose text changed, so the cost of the
+    display does not depend on the packet rate.
+    """
+
+    def __init__(self, rate=20):
+        self.interval  = max(1, round(1000 / rate))
+        self.window    = None
+        self.renderers = {}
+        self.latest    = {}
+        self.rendered  = {}
+        self.shown     = {}
+
+    def add(self, name, render):
+        """
+        Register a slot. `render(value)` returns the (variable, text) pairs showing a published value.
+        """
+        self.renderers[name] = render
+
+    def publish(self, name, value):
+        """
+        Replace the latest value of a slot, callable from any thread.
+        """
+        self.latest[name] = value
+
+    def attach(self, window):
+        self.window = window
+        self.window.after(self.interval, self.refresh)
+
+    def refresh(self):
+        for name, render in self.renderers.items():
+            value = self.latest.get(name)
+            if value is None or value is self.rendered.get(name):
+                continue
+            self.rendered[name] = value
+            for variable, text in render(value):
+                if self.shown.get(variable) != text:
+                    variable.set(text)
+                    self.shown[variable] = text
+        self.window.after(self.interval, self.refresh)
@@ -0,0 +1,764 @@
+import argparse
+import json
+import functools
+import socket, traceback
+import threading
+import time
+
+import protocol
+import receiver
+import async_engine
+import sessions
+import ringbuffer
+import gestures
+import executor
+import backends
+import metrics
+import recorder
+import scheduler
+import templates
+
+NS = 1000000000
+
+# Prefix of the dispatch keys of gestures recognized from templates, followed by the template's action
+TEMPLATE_GESTURE = 'Template:'
+
+class ControlServer:
+    """
+    Packet ingestion, gesture recognition and action dispatch, without any user interface. It opens a UDP socket
+    on `start` and turns the packets of every client device into keys and volume changes through the output backend.
+
+    State changes are reported through the `on_*` hooks, which do nothing here. They are called from the
+    ingestion threads, so a front end overriding them (the Tk `Server`) must hand the work to its own thread.
+    """
+
+    def __init__(self, host, port, batch_size=64, rcvbuf=None, engine='threaded', action_queue=32, overflow=executor.COALESCE,
+                 backend=None, settings_path='./server/settings.json', active=False, metrics_enabled=False, metrics_port=None,
+                 record_path=None, templates_path='./server/templates.json', tilt_window=4):
+        self.host          = host
+        self.port          = port
+        self.batch_size    = batch_size
+        self.rcvbuf        = rcvbuf
+        self.engine        = engine
+        self.action_queue  = action_queue
+        self.overflow      = overflow
+        self.backend       = backend
+        self.settings_path = settings_path
+        self.metrics_port  = metrics_port
+        self.record_path   = record_path
+        self.recorder      = None
+
+        self.ACTIONS = {"Not Used"    : {"function": self.not_used,      "has_params": False},
+                        "Play/Pause"  : {"function": self.play_pause,    "has_params": False},
+                        "Previous"    : {"function": self.previous,      "has_params": False},
+                        "Next"        : {"function": self.next,          "has_params": False},
+                        "Stop"        : {"function": self.stop,          "has_params": False},
+                        "Volume+"     : {"function": self.increase_vol,  "has_params": True},
+                        "Volume-"     : {"function": self.decrease_vol,  "has_params": True},
+                        "Seek+"       : {"function": self.increase_seek, "has_params": True},
+                        "Seek-"       : {"function": self.decrease_seek, "has_params": True},
+                        "Scroll UP"   : {"function": self.scroll_up,     "has_params": True},
+                        "Scroll DOWN" : {"function": self.scroll_down,   "has_params": True},
+                        "Mute"        : {"function": self.mute,          "has_params": False},
+                        "OK"          : {"function": self.ok,            "has_params": False},
+                        "ESC"         : {"function": self.esc,           "has_params": False}}
+
+        self.TYPES = ["Constant",
+                      "Incremental",
+                      "Steps"]
+
+        # Sources of the gestures of a screen region: accelerometer or rotation vector deltas over the gesture window,
+        # the orientation fused from the gyroscope and accelerometer, which also recognizes twists, or the templates
+        # recorded by the user, each mapped to its own action
+        self.SENSOR_SOURCES = ["Accelerometer",
+                               "Rotation",
+                               "Orientation",
+                               "Template"]
+        self.recognizer = templates.TemplateRecognizer(templates_path)
+
+        # Screen regions of the layout tab, each with its tilt and twist gestures and its sensor source
+        self.REGIONS = ["LS", "RS", "TS", "BS"]
+
+        # Actions repeated on every packet while held, every other action repeats every ACTION_REPEAT sec unless
+        # it has its own interval in REPEAT_INTERVALS
+        self.CONTINUOUS_ACTIONS = frozenset(("Volume+", "Volume-", "Seek+", "Seek-", "Scroll UP", "Scroll DOWN"))
+        self.ACTION_REPEAT      = 0.5
+        self.REPEAT_INTERVALS   = {"Play/Pause" : 1.0,
+                                   "Stop"       : 1.0,
+                                   "Mute"       : 1.0}
+
+        # Actions that accept a repetition count, so queued repeats can be merged into one call
+        self.COALESCABLE_ACTIONS = frozenset(("Volume+", "Volume-", "Seek+", "Seek-", "Scroll UP", "Scroll DOWN"))
+
+        # Steps of the continuous actions. With the Incremental type the steps per packet, and with the Steps type
+        # the steps per second (STEP_RATE at STEP_ANGLE), grow with the tilt angle since the start of the gesture
+        self.VOLUME_STEP = 2.0 # dB
+        self.STEP_ANGLE  = 0.2 # rad
+        self.STEP_RATE   = 5
+        self.MAX_STEPS   = 10
+
+        self.settings = {}
+        self.populate_settings()
+
+        # Actions of the remote tab are named directly by the client and do not depend on the settings
+        self.remote_dispatch = {interaction: self.compile_action(interaction, 'Not Used') for interaction in self.ACTIONS}
+
+        # Idle timeouts (sec) after the last received packet. The gesture release timeout of each session follows
+        # its measured packet interval (~0.21 sec from the app), see `AdaptiveScheduler`
+        self.WAITING_TIMEOUT    = 1
+        self.DISCONNECT_TIMEOUT = 60
+        self.scheduler          = scheduler.AdaptiveScheduler(maximum=self.WAITING_TIMEOUT)
+
+        # The threaded engine's controller sleeps until the next idle timeout (ns, infinite while it scans the
+        # sessions, 0 while no controller runs), a new client or a packet making a release due before it wakes it
+        self.controller_wakeup   = threading.Event()
+        self.controller_deadline = 0
+
+        # Tilt classification: samples per gesture window and low-pass smoothing factor, 4 samples at 0.5 weigh the
+        # window as a least squares slope so one noisy sample does not decide the direction. A tilt whose dominant
+        # axis moved TILT_MARGIN times more than the other is classified from the second sample on, like the
+        # original comparison of the first two samples, only unclear tilts wait for the full window. A gesture is
+        # classified once, without the hysteresis `classify_tilt` applies between consecutive windows of a recording
+        self.TILT_WINDOW    = tilt_window
+        self.TILT_SMOOTHING = 0.5
+        self.TILT_MARGIN    = 2.0
+
+        # Orientation gestures: smallest rotation (rad) recognized and how far ahead (sec) the current rotation is extrapolated
+        self.TILT_ANGLE       = 0.2
+        self.FUSION_LOOKAHEAD = 0.1
+
+        self.active_status = active
+        self.device_tabs   = ('layout', 'remote')
+
+        # Keys and volume go through the platform's output backend (keyboard and PyCAW on Windows)
+        self.output = backends.create(self.backend)
+
+        # Stage timings are only taken when metrics are enabled, a port to export them implies it
+        self.metrics = metrics.Metrics() if metrics_enabled or metrics_port else None
+
+        # Keyboard and audio calls run on their own worker so they never block packet reception
+        self.executor = executor.ActionExecutor(maxsize=self.action_queue, policy=self.overflow, coalescable=self.COALESCABLE_ACTIONS,
+                                                metrics=self.metrics)
+
+        # Everything is timed with the monotonic clock in ns. The wall clock is only needed to compare
+        # with the client's clock, it is derived from the monotonic clock with the offset taken here
+        self.wall_clock_offset = time.time_ns() - time.monotonic_ns()
+
+    def populate_settings(self):
+        """
+        This function populates the application's setting on startup. If there is not a settings.json file present,
+        create one with default parameters.
+        """
+        try:
+            with open(self.settings_path) as json_file:
+                self.settings = json.load(json_file)
+        except:
+            print('No settings file found. Created file with default settings.')
+            self.settings['LSTU'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['LSTD'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['LSTL'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['LSTR'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['RSTU'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['RSTD'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['RSTL'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['RSTR'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['TSTU'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['TSTD'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['TSTL'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['TSTR'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['BSTU'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['BSTD'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['BSTL'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+            self.settings['BSTR'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
+
+        # Settings saved before the twist gestures and the sensor sources existed get their defaults
+        for region in self.REGIONS:
+            self.settings.setdefault(region + 'WL', {'Interaction' : 'Not Used', 'Type' : 'Not Used'})
+            self.settings.setdefault(region + 'WR', {'Interaction' : 'Not Used', 'Type' : 'Not Used'})
+            self.settings.setdefault(region, {'Sensor' : 'Accelerometer'})
+
+        self.compile_dispatch()
+
+    def compile_action(self, interaction, type):
+        """
+        Returns a dispatch entry: the interaction name, its action with the parameters already bound, whether the
+        action repeats continuously while held, the type of the setting and the interval (sec) between repetitions.
+        """
+        action = self.ACTIONS[interaction]
+        if action['has_params']:
+            function = functools.partial(action['function'], type)
+        else:
+            function = action['function']
+        continuous = interaction in self.CONTINUOUS_ACTIONS
+        repeat     = self.REPEAT_INTERVALS.get(interaction, 0.0 if continuous else self.ACTION_REPEAT)
+        return (interaction, function, continuous, type, repeat)
+
+    def compile_dispatch(self):
+        """
+        Compile the settings into a flat table from region and gesture code (e.g. LSTU) to a dispatch entry, so
+        handling a packet takes a single lookup, and a table from region (e.g. LS) to its sensor source. The tables
+        are rebuilt whenever a setting changes.
+        """
+        self.dispatch       = {key: self.compile_action(setting['Interaction'], setting['Type'])
+                               for key, setting in self.settings.items() if 'Interaction' in setting}
+        self.dispatch.update({TEMPLATE_GESTURE + interaction: self.compile_action(interaction, "Constant") for interaction in self.ACTIONS})
+        self.region_sensors = {key: setting['Sensor'] for key, setting in self.settings.items() if 'Sensor' in setting}
+
+        # The orientation filters only run when a region uses them
+        self.fusion_enabled = "Orientation" in self.region_sensors.values()
+
+    def save_settings(self):
+        """
+        Save settings from the application to a json file.
+        """
+        with open(self.settings_path, 'w') as json_settings:
+            json.dump(self.settings, json_settings)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Front End Hooks ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+    def on_connect(self, session):
+        pass
+
+    def on_disconnect(self, session):
+        pass
+
+    def on_waiting(self, session):
+        pass
+
+    def on_release(self, session):
+        pass
+
+    def on_interaction(self, session, description):
+        """
+        A new interaction became active, `description` is the text shown to the user.
+        """
+        pass
+
+    def on_action(self, session, interaction):
+        """
+        Called for every packet that repeats the active interaction, whether or not its action is executed.
+        """
+        pass
+
+    def on_sample(self, session, data):
+        pass
+
+    def on_warning(self, message):
+        pass
+
+    def on_batch(self):
+        """
+        A batch of packets has been handled, the receive and action counters changed.
+        """
+        pass
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Sessions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+    def connect(self, address):
+        """
+        Open a new session for a client device sending data for the first time.
+        """
+        session = sessions.ClientSession(address)
+        self.sessions[address] = session
+        self.controller_wakeup.set()
+        self.on_connect(session)
+        return session
+
+    def describe_clients(self):
+        return ", ".join(address[0] for address in list(self.sessions)) or "Not connected"
+
+    def release_interaction(self, session):
+        session.release()
+        self.on_release(session)
+
+    def mark_waiting(self, session):
+        self.on_waiting(session)
+
+    def disconnect(self, session):
+        self.sessions.pop(session.address, None)
+        if self.last_session is session:
+            self.last_session = None
+        self.on_disconnect(session)
+
+    def action_controller(self):
+        while True:
+            # Cleared before the sessions are read, so a client connecting or a packet arriving from now on wakes the
+            # wait below until the deadline is known
+            self.controller_deadline = float('inf')
+            self.controller_wakeup.clear()
+            now      = time.monotonic_ns()
+            deadline = None
+            for session in list(self.sessions.values()):
+                idle = now - session.received_time_history
+                if idle >= session.release_timeout * NS:
+                    self.release_interaction(session)
+
+                if idle >= self.WAITING_TIMEOUT * NS:
+                    self.mark_waiting(session)
+
+                if idle >= self.DISCONNECT_TIMEOUT * NS:
+                    self.disconnect(session)
+                    continue
+
+                # Packets only push the timeouts later, the earliest one still to come is the next wakeup
+                for timeout in (session.release_timeout, self.WAITING_TIMEOUT, self.DISCONNECT_TIMEOUT):
+                    if idle < timeout * NS:
+                        due = session.received_time_history + timeout * NS
+                        if deadline is None or due < deadline:
+                            deadline = due
+                        break
+
+            # Without clients nothing is due until one connects
+            self.controller_deadline = float('inf') if deadline is None else deadline
+            self.controller_wakeup.wait(None if deadline is None else max(deadline - time.monotonic_ns(), 0) / NS)
+
+    def reset_connection(self):
+        """
+        Initialize the session table before any packet is received. Sessions are keyed by the (ip, port) address of each client.
+        """
+        self.sessions     = {}
+        self.last_session = None # Session that received the most recent packet
+
+    def get_data(self):
+        """
+        Read and deserialize the UDP data stream from the connected device's sensors.
+
+        Parameters:
+        -----------
+            data (`str`): Data read from UDP stream.
+
+        Returns:
+        --------
+            None
+        """
+        self.action_controller_thread = threading.Thread(target=self.action_controller, daemon=True)
+        self.action_controller_thread.start()
+
+        while True:
+            try:
+                # Drain every pending datagram in one wakeup before doing any per-packet work
+                batch = self.receiver.recv_batch()
+                if batch:
+                    if self.metrics is not None:
+                        self.metrics.observe('receive', self.receiver.drain_time // len(batch), len(batch))
+                    self.handle_batch(batch, time.monotonic_ns())
+
+            except (KeyboardInterrupt, SystemExit):
+                raise traceback.print_exc()
+
+    def handle_batch(self, batch, received_time, timeline=None):
+        """
+        Decode a batch of datagrams and feed them to the interaction pipeline in arrival order.
+
+        Parameters:
+        -----------
+            batch (`list`): Pairs of (raw datagram, client address) as returned by the receiver.
+            received_time (`int`): Monotonic time (ns) at which the batch was read from the socket.
+            timeline (`int`): Time (ns) of the batch on the clock the packet intervals, action repeats and sensor
+                              integration are timed with, when it is not `received_time` (a replayed recording).
+
+        Returns:
+        --------
+            None
+        """
+        # The raw datagrams are only valid until the next batch, they are recorded before anything else
+        if self.recorder is not None:
+            self.recorder.write_batch(batch, received_time)
+
+        metrics = self.metrics
+        if metrics is not None:
+            start = time.perf_counter_ns()
+
+        # Binary and text packets are both recognized here, anything else is dropped
+        packets = [(protocol.decode_packet(message), address) for message, address in batch]
+
+        if metrics is not None:
+            metrics.observe('decode', (time.perf_counter_ns() - start) // len(batch), len(batch))
+
+        # Server's time of day at reception, to compare with the clients' timesteps
+        arrival = self.time_of_day(received_time)
+
+        for packet, address in packets:
+            if packet is None:
+                self.receiver.malformed += 1
+                continue
+
+            session = self.sessions.get(address)
+            if session is None:
+                session = self.connect(address)
+
+            self.scheduler.observe(session, received_time if timeline is None else timeline)
+            session.received_time_history = received_time
+            # A gesture starting after a pause, or a shorter release timeout, is due before the controller wakes
+            if received_time + session.release_timeout * NS < self.controller_deadline:
+                self.controller_wakeup.set()
+
+            control_type, data = packet
+            if control_type == protocol.LAYOUT:
+                # Late and duplicated packets are dropped before they reach the gesture stage
+                interval = session.interval if session.active_interaction or session.gesture_samples else None
+                if not session.sequencer.accept(data, arrival, interval):
+                    continue
+
+                session.control_type = self.device_tabs[0]
+                session.timestep     = data['Timestep']
+                values               = protocol.sample_values(data)
+                session.samples.append(data['Timestep'], values)
+                if self.fusion_enabled:
+                    # Rates are integrated over the client's timesteps when they are fine enough, the packets of a
+                    # batch share their reception time
+                    if session.sequencer.fine:
+                        sample_time = round(protocol.timestep_seconds(data['Timestep']) * NS)
+                    else:
+                        sample_time = session.packet_time
+                    session.orientation.update(values[0:3] if data['Gyroscope']['x'] != protocol.NOT_READY else None,
+                                               values[3:6] if data['Accelerometer']['x'] != protocol.NOT_READY else None, sample_time)
+                self.on_sample(session, data)
+
+                sensor   = self.region_sensors.get(data['Action'], "Accelerometer")
+                required = ('Gyroscope', 'Accelerometer') if sensor == "Orientation" or sensor == "Template" else (sensor,)
+                if any(data[name]['x'] != protocol.NOT_READY for name in required):
+                    self.execute_command(session, data, mode="layout", sensor=sensor)
+                else:
+                    self.on_warning(' or '.join(required) + ' is not supported in this device')
+            else:
+                session.control_type = self.device_tabs[1]
+                self.execute_command(session, data, mode="remote")
+
+            self.last_session = session
+
+        self.on_batch()
+
+    def time_of_day(self, monotonic_time):
+        """
+        Returns the local time of day (sec since midnight) at a monotonic time (ns), as the clients' timesteps.
+        """
+        wall  = monotonic_time + self.wall_clock_offset
+        clock = time.localtime(wall // NS)
+        return clock.tm_hour * 3600 + clock.tm_min * 60 + clock.tm_sec + wall % NS / NS
+
+    def network_latency(self, session):
+        """
+        Returns the time (sec) between the client's timestep of the latest layout packet and its reception, or None
+        for a session without layout packets. It is only as accurate as the synchronization of both clocks and the
+        resolution of the timestep (whole seconds for text packets).
+        """
+        if session.timestep is None:
+            return None
+        latency = self.time_of_day(session.received_time_history) - protocol.timestep_seconds(session.timestep)
+        # The time of day wraps around at midnight
+        return (latency + 43200) % 86400 - 43200
+
+    def execute_command(self, session, data, mode, sensor="Accelerometer"):
+        """
+        Executes an action based on sensor data, when active_status is set.
+
+        Parameters:
+        -----------
+            session (`ClientSession`): Session of the client device that sent the data.
+            data (`dict`): Dictionary containing data from the client's sensors.
+            sensor (`str`): Sensor source of the gestures of the packet's region, one of `SENSOR_SOURCES`.
+
+        Returns:
+        --------
+            None
+        """
+
+        if mode=="layout":
+            session.gesture_samples += 1
+
+        # Time between dataframes ~ 0.21 sec which means that when this thrueshold is passed a new action should be activated
+        if session.active_interaction == '':
+            if mode=="layout":
+                if sensor == "Template":
+                    # The gesture is recognized once its samples are close enough to a recorded template
+                    if self.metrics is not None:
+                        start = time.perf_counter_ns()
+                    match = self.recognizer.match(session.samples.window(session.gesture_samples))
+                    if self.metrics is not None:
+                        self.metrics.observe('tilt', time.perf_counter_ns() - start)
+                    if match is None:
+                        return False
+                    gesture = TEMPLATE_GESTURE + match[1]
+                elif sensor == "Orientation":
+                    # The orientation at the first sample is the baseline, the gesture is recognized as soon as the
+                    # phone turned far enough, which can be on the first sample when it is already turning fast
+                    if session.gesture_samples == 1:
+                        session.orientation.mark()
+                    if self.metrics is not None:
+                        start = time.perf_counter_ns()
+                    tilt = gestures.classify_orientation(session.orientation.change(self.FUSION_LOOKAHEAD), self.TILT_ANGLE)
+                    if self.metrics is not None:
+                        self.metrics.observe('tilt', time.perf_counter_ns() - start)
+                    if tilt is None:
+                        return False
+                    session.tilt = tilt
+                    gesture      = data['Action'] + tilt
+                else:
+                    # The filtered difference of the gesture window is summed as its samples arrive. A clear tilt is
+                    # classified from the first and latest samples, an unclear one once the window is full
+                    if self.metrics is not None:
+                        start = time.perf_counter_ns()
+                    if session.gesture_samples > self.TILT_WINDOW:
+                        # Samples counted by another sensor source of the previous region, the window starts over
+                        session.gesture_samples, session.tilt_delta = 1, (0.0, 0.0)
+                    weight = gestures.tilt_weights(self.TILT_WINDOW, self.TILT_SMOOTHING)[session.gesture_samples - 1]
+                    values = data[sensor]
+                    x, y   = values['x'], values['y']
+                    delta_x, delta_y   = session.tilt_delta
+                    session.tilt_delta = (delta_x + weight * x, delta_y + weight * y)
+                    if session.gesture_samples == 1:
+                        session.tilt_first = (x, y)
+                        return False
+                    if session.gesture_samples < self.TILT_WINDOW:
+                        first_x, first_y = session.tilt_first
+                        tilt = gestures.early_tilt(x - first_x, y - first_y, self.TILT_MARGIN)
+                        if tilt is None:
+                            return False
+                    else:
+                        tilt = gestures.classify_delta(*session.tilt_delta)
+                    session.tilt = tilt
+                    if self.metrics is not None:
+                        self.metrics.observe('tilt', time.perf_counter_ns() - start)
+                    gesture = data['Action'] + session.tilt
+                session.active_interaction = gesture
+                if session.active_interaction not in self.dispatch:
+                    session.release()
+                    return False
+                self.on_interaction(session, session.active_interaction + " - (" + self.dispatch[session.active_interaction][0] + ")")
+            else:
+                session.active_interaction = data[0]
+                if session.active_interaction == 'Play' or session.active_interaction == 'Pause':
+                    session.active_interaction = 'Play/Pause'
+                if session.active_interaction == 'Unmute':
+                    session.active_interaction = 'Mute'
+                if session.active_interaction not in self.remote_dispatch:
+                    session.release()
+                    return False
+                self.on_interaction(session, data[0])
+
+        if not session.active_interaction:
+            return False
+        if self.metrics is not None:
+            start = time.perf_counter_ns()
+        interaction, action, continuous, type, repeat = (self.dispatch if mode=="layout" else self.remote_dispatch)[session.active_interaction]
+        if self.metrics is not None:
+            self.metrics.observe('lookup', time.perf_counter_ns() - start)
+
+        # When active_status is active the application is controlling this device's resources
+        if self.active_status:
+            if mode=="layout":
+                # Repeats are timed on the scheduler's clock, the recorded one when replaying, and the latency
+                # of the action on the monotonic clock
+                now = session.packet_time
+                if self.scheduler.repeat_due(session, repeat, now):
+                    steps = self.action_steps(session, type, sensor) if continuous else 1
+                    if steps:
+                        self.executor.submit(interaction, action, session.received_time_history, steps)
+                        session.last_action_time = now
+            else:
+                self.executor.submit(interaction, action, session.received_time_history)
+
+        self.on_action(session, interaction)
+
+    def action_steps(self, session, type, sensor):
+        """
+        Returns the number of steps a continuous action makes for the latest packet of a session, given the type
+        of its setting:
+        * Constant: one step per packet.
+        * Incremental: one step per STEP_ANGLE of tilt per packet, up to MAX_STEPS.
+        * Steps: STEP_RATE steps per second per STEP_ANGLE of tilt, the fraction of a step left is carried over
+          to the next packet. The first packet of the interaction always makes a step.
+        """
+        if type != "Incremental" and type != "Steps":
+            return 1
+
+        # Tilt since the start of the gesture, from the fused orientation or the samples of the region's sensor in the
+        # ring. Templates have no tilt of their own, their steps follow the gravity measured by the accelerometer
+        if sensor == "Orientation":
+            angle = max(abs(change) for change in session.orientation.change())
+        else:
+            window = session.samples.window(session.gesture_samples)[:, ringbuffer.SENSORS.get(sensor, ringbuffer.ACCELEROMETER)].tolist()
+            angle  = (gestures.rotation_angle if sensor == "Rotation" else gestures.tilt_angle)(window[0], window[-1])
+        tilt = angle / self.STEP_ANGLE
+
+        if type == "Incremental":
+            return min(max(round(tilt), 1), self.MAX_STEPS)
+
+        now = session.packet_time
+        if session.step_credit is None:
+            session.step_credit, session.step_time = 0.0, now
+            return 1
+        elapsed = min(now - session.step_time, session.release_timeout * NS) / NS
+        session.step_credit = min(session.step_credit + tilt * self.STEP_RATE * elapsed, self.MAX_STEPS)
+        session.step_time   = now
+        steps = int(session.step_credit)
+        session.step_credit -= steps
+        return steps
+
+    def network_stats(self):
+        """
+        Returns the packet sequencing counters summed over the connected clients, and the counters and clock
+        estimates of each client under `devices`.
+        """
+        devices = {address[0] + ':' + str(address[1]): session.sequencer.stats() for address, session in list(self.sessions.items())}
+        totals  = {key: sum(stats[key] for stats in devices.values()) for key in ('accepted', 'duplicates', 'reordered', 'lost')}
+        return dict(totals, devices=devices)
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Action Functions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+    def not_used(self):
+        pass
+
+    def play_pause(self):
+        self.output.key("space")
+
+    def previous(self):
+        self.output.key("left")
+
+    def next(self):
+        self.output.key("right")
+
+    def stop(self):
+        pass
+
+    def increase_vol(self, mode, count=1):
+        """
+        Increase system's volume by `count` steps. Coalesced repetitions are applied in a single call.
+        """
+        self.output.volume_step(self.VOLUME_STEP * count)
+
+    def decrease_vol(self, mode, count=1):
+        """
+        Decrease system's volume by `count` steps. Coalesced repetitions are applied in a single call.
+        """
+        self.output.volume_step(-self.VOLUME_STEP * count)
+
+    def increase_seek(self, mode, count=1):
+        """
+        Seek forward with the media players' short jump key, `count` times.
+        """
+        self.output.key("shift+right", count)
+
+    def decrease_seek(self, mode, count=1):
+        """
+        Seek backward with the media players' short jump key, `count` times.
+        """
+        self.output.key("shift+left", count)
+
+    def scroll_up(self, arg, count=1):
+        self.output.key("up", count)
+
+    def scroll_down(self, arg, count=1):
+        self.output.key("down", count)
+
+    def mute(self):
+        self.output.toggle_mute()
+
+    def ok(self):
+        self.output.key("enter")
+
+    def esc(self):
+        self.output.key("esc")
+
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Lifecycle ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+    def start(self):
+        """
+        Start the action worker and listen to the UDP stream.
+        """
+        if self.record_path:
+            self.recorder = recorder.SessionRecorder(self.record_path)
+            print("Recording session to " + self.record_path)
+
+        self.executor.start()
+        self.create_udp_stream()
+
+        if self.metrics is not None:
+            self.metrics.add_source('receiver', self.receiver.stats)
+            self.metrics.add_source('executor', self.executor.stats)
+            self.metrics.add_source('network', self.network_stats)
+            if self.metrics_port:
+                self.exporter = metrics.MetricsExporter(self.metrics, self.metrics_port)
+                self.exporter.start()
+                print("Metrics served on http://127.0.0.1:" + str(self.metrics_port) + "/metrics")
+
+    def shutdown(self):
+        """
+        Stop executing actions, stop the event loop of the asyncio engine and close the session recording.
+        The threaded engine's reader is a daemon thread and ends with the process.
+        """
+        self.executor.stop()
+        if self.engine == 'asyncio':
+            self.receiver.stop()
+
+        session_recorder, self.recorder = self.recorder, None
+        if session_recorder is not None:
+            session_recorder.close()
+
+    def create_udp_stream(self):
+        """
+        Create a socket connection and listen to datapackets.
+        """
+
+        # TODO We need to check here if we need socket.SOCK_STREAM for TCP connection
+        # The asyncio engine's socket times its reads, which happen inside the event loop
+        socket_type = async_engine.TimedSocket if self.engine == 'asyncio' else socket.socket
+        self.s = socket_type(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+
+        # Bind the IP address and port number to socket instance
+        self.s.bind((self.host, self.port))
+
+        print("Success binding: UDP server up and listening")
+
+        self.reset_connection()
+
+        if self.engine == 'asyncio':
+            # Packets are handled on an asyncio event loop and idle timeouts are scheduled timers
+            self.receiver = async_engine.AsyncioEngine(self, self.s, rcvbuf=self.rcvbuf)
+            self.receiver.start()
+        else:
+            # Pending datagrams are drained in batches into a preallocated buffer pool (buffer size 1024)
+            self.receiver = receiver.DatagramReceiver(self.s, batch_size=self.batch_size, buffer_size=1024, rcvbuf=self.rcvbuf)
+
+            self.sensor_data = threading.Thread(target=self.get_data, daemon=True) # Use daemon=True to kill thread when applications exits
+            self.sensor_data.start()
+
+def argument_parser(description):
+    """
+    Returns the command line options shared by the GUI and the headless server.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--port', type=int, default=50000, help="UDP port to listen to")
+    parser.add_argument('--batch-size', type=int, default=64, help="Maximum datagrams drained per wakeup")
+    parser.add_argument('--rcvbuf', type=int, default=None, help="Socket receive buffer size (SO_RCVBUF) in bytes")
+    parser.add_argument('--engine', choices=['threaded', 'asyncio'], default='threaded', help="Packet ingestion engine")
+    parser.add_argument('--action-queue', type=int, default=32, help="Maximum number of actions waiting to be executed")
+    parser.add_argument('--overflow', choices=[executor.COALESCE, executor.DROP_OLDEST], default=executor.COALESCE,
+                        help="Action queue policy: merge repeated Volume/Scroll actions or only drop the oldest action when full")
+    parser.add_argument('--backend', choices=list(backends.BACKENDS), default=None,
+                        help="Output backend for keys and volume, the current platform's by default")
+    parser.add_argument('--settings', default='./server/settings.json', help="Region to action settings file")
+    parser.add_argument('--metrics', action='store_true', help="Record the duration of every pipeline stage")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve the metrics on localhost as Prometheus text (/metrics) and JSON (/metrics.json), implies --metrics")
+    parser.add_argument('--record', default=None, help="Append every received datagram to this session log, see replay.py")
+    parser.add_argument('--templates', default='./server/templates.json', help="Gesture templates file, see templates.py")
+    parser.add_argument('--tilt-window', type=int, default=4,
+                        help="Samples after which a tilt is classified even when its direction is unclear, 2 always compares the first two samples")
+    return parser
+
+def server_options(args):
+    """
+    Returns the keyword arguments of `ControlServer` given by the parsed command line.
+    """
+    return {'host'            : '',
+            'port'            : args.port,
+            'batch_size'      : args.batch_size,
+            'rcvbuf'          : args.rcvbuf,
+            'engine'          : args.engine,
+            'action_queue'    : args.action_queue,
+            'overflow'        : args.overflow,
+            'backend'         : args.backend,
+            'settings_path'   : args.settings,
+            'metrics_enabled' : args.metrics,
+            'metrics_port'    : args.metrics_port,
+            'record_path'     : args.record,
+            'templates_path'  : args.templates,
+            'tilt_window'     : args.tilt_window}
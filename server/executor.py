@@ -0,0 +1,134 @@
+import collections
+import threading
+import time
+import traceback
+
+DROP_OLDEST = 'drop_oldest'
+COALESCE    = 'coalesce'
+
+class ActionExecutor:
+    """
+    Runs actions (keyboard and audio calls) on a dedicated worker thread so a slow OS call never blocks
+    packet reception. Actions wait in a bounded queue and the oldest one is dropped when it is full. With the
+    `COALESCE` policy a coalescable action (Volume+/-, Scroll) submitted while the same action is still waiting
+    is merged into it, and the worker makes a single call with the repetition count (`function(count=n)`).
+    A `maxsize` of None never drops an action, for a replay whose actions have to be counted exactly.
+    With a `metrics.Metrics`, the queue wait, the call and the time since the originating packet are recorded.
+    """
+
+    def __init__(self, maxsize=32, policy=COALESCE, coalescable=(), metrics=None):
+        self.maxsize     = maxsize
+        self.policy      = policy
+        self.coalescable = frozenset(coalescable)
+        self.metrics     = metrics
+
+        self.pending   = collections.deque() # Entries of [name, function, count, enqueue time, packet time]
+        self.condition = threading.Condition()
+        self.thread    = threading.Thread(target=self.run, daemon=True)
+        self.running   = False
+
+        self.submitted      = 0
+        self.executed       = 0
+        self.coalesced      = 0
+        self.dropped        = 0
+        self.failed         = 0
+        self.calls          = 0
+        self.max_depth      = 0
+        self.last_latency   = 0.0 # Seconds between submission and the end of the call
+        self.max_latency    = 0.0
+        self.total_latency  = 0.0
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def submit(self, name, function, origin=None, count=1):
+        """
+        Queue an action, returns immediately.
+
+        Parameters:
+        -----------
+            name (`str`): Interaction name, used to coalesce repeated actions.
+            function (`callable`): Action with its parameters already bound. Coalescable actions must accept a
+                                   `count` keyword to apply several repetitions in one call.
+            origin (`int`): Monotonic time (ns) of the packet that caused the action, for the end to end latency.
+            count (`int`): Repetitions of the action, passed to coalescable actions as their `count`.
+
+        Returns:
+        --------
+            None
+        """
+        with self.condition:
+            self.submitted += 1
+            if self.policy == COALESCE and name in self.coalescable and self.pending and self.pending[-1][0] == name:
+                # The same action is still waiting, run it more times instead of queueing another call
+                self.pending[-1][2] += count
+                self.coalesced += 1
+                return
+
+            if self.maxsize is not None and len(self.pending) >= self.maxsize:
+                self.pending.popleft()
+                self.dropped += 1
+
+            self.pending.append([name, function, count, time.perf_counter(), origin])
+            if len(self.pending) > self.max_depth:
+                self.max_depth = len(self.pending)
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                name, function, count, submitted, origin = self.pending.popleft()
+
+            started = time.perf_counter()
+            try:
+                if count > 1:
+                    function(count=count)
+                else:
+                    function()
+            except Exception:
+                self.failed += 1
+                traceback.print_exc()
+
+            finished = time.perf_counter()
+            latency  = finished - submitted
+            self.calls         += 1
+            self.executed      += count
+            self.last_latency   = latency
+            self.total_latency += latency
+            if latency > self.max_latency:
+                self.max_latency = latency
+
+            if self.metrics is not None:
+                self.metrics.observe('queue', int((started - submitted) * 1e9))
+                self.metrics.observe('action', int((finished - started) * 1e9))
+                if origin is not None:
+                    self.metrics.observe('end_to_end', time.monotonic_ns() - origin)
+
+    @property
+    def depth(self):
+        return len(self.pending)
+
+    def stats(self):
+        """
+        Returns a snapshot of the queue metrics.
+        """
+        return {'depth'           : self.depth,
+                'max_depth'       : self.max_depth,
+                'submitted'       : self.submitted,
+                'executed'        : self.executed,
+                'coalesced'       : self.coalesced,
+                'dropped'         : self.dropped,
+                'failed'          : self.failed,
+                'last_latency'    : self.last_latency,
+                'max_latency'     : self.max_latency,
+                'average_latency' : self.total_latency / self.calls if self.calls > 0 else 0.0}
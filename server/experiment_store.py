@@ -0,0 +1,154 @@
+import argparse
+import datetime
+import glob
+import json
+import os
+
+import numpy as np
+
+# One fixed-size record per test. Categorical columns hold a code into the store's category lists
+RECORD = np.dtype([('session',          '<M8[s]'), # Start of the experiment session
+                   ('action',           'u1'),
+                   ('mode',             'u1'),
+                   ('tab',              'u1'),
+                   ('correct',          '?'),
+                   ('time',             '<f8'),    # Reaction time (sec)
+                   ('network_latency',  '<f4'),    # Phone to server (sec), NaN when unknown
+                   ('dispatch_latency', '<f4')])   # Packet reception to match (sec), NaN when unknown
+
+STORE_VERSION = 1
+
+class ExperimentStore:
+    """
+    Append-only columnar store of experiment results. Records are appended as raw bytes to `<path>.bin` and the
+    whole file is loaded with a single read into a NumPy structured array. The category lists of the action,
+    mode and tab columns are kept in `<path>.json`, which is only rewritten when a new category appears.
+    """
+
+    def __init__(self, path='./reports/experiments/experiments'):
+        self.data_path       = path + '.bin'
+        self.categories_path = path + '.json'
+        self.categories      = {'action': [], 'mode': ['speed', 'interactive'], 'tab': ['layout', 'remote']}
+        if os.path.exists(self.categories_path):
+            with open(self.categories_path) as categories_file:
+                self.categories = json.load(categories_file)['categories']
+
+    def encode(self, column, value):
+        categories = self.categories[column]
+        if value not in categories:
+            categories.append(value)
+            self.save_categories()
+        return categories.index(value)
+
+    def save_categories(self):
+        # Written to a temporary file first so a crash never leaves a truncated category list behind
+        directory = os.path.dirname(self.categories_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.categories_path + '.tmp', 'w') as categories_file:
+            json.dump({'version': STORE_VERSION, 'categories': self.categories}, categories_file)
+        os.replace(self.categories_path + '.tmp', self.categories_path)
+
+    def append(self, session, results):
+        """
+        Append the results of one experiment session.
+
+        Parameters:
+        -----------
+            session (`str`): Start of the session as YYYYmmddHHMMSS, as in the former CSV file names.
+            results (`list`): Tuples of (required action, time, network latency, dispatch latency, correct, mode, tab),
+                              the latencies may be None.
+
+        Returns:
+        --------
+            None
+        """
+        records = np.zeros(len(results), dtype=RECORD)
+        records['session'] = np.datetime64(datetime.datetime.strptime(session, "%Y%m%d%H%M%S"), 's')
+        for i, (action, time, network_latency, dispatch_latency, correct, mode, tab) in enumerate(results):
+            records[i]['action']           = self.encode('action', action)
+            records[i]['mode']             = self.encode('mode', mode)
+            records[i]['tab']              = self.encode('tab', tab)
+            records[i]['correct']          = correct
+            records[i]['time']             = time
+            records[i]['network_latency']  = np.nan if network_latency is None else network_latency
+            records[i]['dispatch_latency'] = np.nan if dispatch_latency is None else dispatch_latency
+
+        if not os.path.exists(self.categories_path):
+            self.save_categories()
+        with open(self.data_path, 'ab') as data_file:
+            data_file.write(records.tobytes())
+
+    def load(self):
+        """
+        Returns every record as a structured array, ignoring an incomplete last record.
+        """
+        if not os.path.exists(self.data_path):
+            return np.zeros(0, dtype=RECORD)
+        data = np.fromfile(self.data_path, dtype=np.uint8)
+        return data[:len(data) - len(data) % RECORD.itemsize].view(RECORD)
+
+    def to_dataframe(self, records=None):
+        """
+        Returns the records as a pandas DataFrame with the columns of the former CSV files, categorical columns
+        decoded as pandas categoricals, and the session's Date (YYYYmmdd) and Timestamp (HHMMSS).
+        """
+        import pandas as pd
+
+        if records is None:
+            records = self.load()
+        sessions = pd.to_datetime(records['session'])
+        return pd.DataFrame({'Required Action'  : pd.Categorical.from_codes(records['action'], self.categories['action']),
+                             'Time'             : records['time'],
+                             'Timestamp'        : sessions.strftime('%H%M%S'),
+                             'Date'             : sessions.strftime('%Y%m%d'),
+                             'Network Latency'  : records['network_latency'],
+                             'Dispatch Latency' : records['dispatch_latency'],
+                             'Correct'          : records['correct'],
+                             'Mode'             : pd.Categorical.from_codes(records['mode'], self.categories['mode']),
+                             'Tab'              : pd.Categorical.from_codes(records['tab'], self.categories['tab'])})
+
+def read_csv(filename):
+    """
+    Read an experiment CSV file as written before the store existed. The earliest files have no Tab column, their
+    tests ran on the layout tab then the remote tab for each mode.
+    """
+    import csv
+
+    with open(filename, newline='') as csv_file:
+        rows = list(csv.DictReader(csv_file))
+
+    results = []
+    for i, row in enumerate(rows):
+        tab = row.get('Tab') or ('remote' if 10 <= i < 20 or i >= 30 else 'layout')
+        results.append((row['Required Action'], float(row['Time']),
+                        float(row['Network Latency']) if row.get('Network Latency') else None,
+                        float(row['Dispatch Latency']) if row.get('Dispatch Latency') else None,
+                        row['Correct'] == 'True', row['Mode'], tab))
+    return results
+
+def import_csv(store, filenames):
+    """
+    Append experiment CSV files to the store in session order, skipping sessions already in it.
+    Returns the number of imported rows.
+    """
+    stored   = set(store.load()['session'])
+    imported = 0
+    for filename in sorted(filenames, key=os.path.basename):
+        session = os.path.basename(filename)[:14]
+        if np.datetime64(datetime.datetime.strptime(session, "%Y%m%d%H%M%S"), 's') in stored:
+            continue
+        results = read_csv(filename)
+        store.append(session, results)
+        imported += len(results)
+    return imported
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import experiment CSV files into the experiment store")
+    parser.add_argument('files', nargs='*', help="CSV files to import, every file of reports/experiments by default")
+    parser.add_argument('--store', default='./reports/experiments/experiments', help="Store path, without extension")
+    args = parser.parse_args()
+
+    store    = ExperimentStore(args.store)
+    imported = import_csv(store, args.files or glob.glob('./reports/experiments/*.csv'))
+    print(str(imported) + " results imported into " + store.data_path)
@@ -0,0 +1,88 @@
+import math
+
+# Seconds without samples after which the estimate restarts from the accelerometer alone
+RESET_GAP = 1.0
+
+class OrientationFilter:
+    """
+    Complementary filter estimating the orientation of a phone from its gyroscope and accelerometer.
+
+    The gyroscope rates are integrated for a fast, smooth estimate that drifts, and the angles given by the direction
+    of gravity are blended in with a time constant of `tau` seconds to correct the drift. Twist (yaw) cannot be seen
+    by the accelerometer and is only integrated, which is enough for the duration of a gesture.
+
+    Angles are in radians, with the sign conventions of the accelerometer deltas used by `gestures.classify_tilt`:
+    roll grows when the phone tilts left, pitch when it tilts up and yaw when it twists counterclockwise.
+    """
+
+    __slots__ = ('tau', 'roll', 'pitch', 'yaw', 'rate', 'baseline', 'updated')
+
+    def __init__(self, tau=0.5):
+        self.tau      = tau
+        self.roll     = 0.0
+        self.pitch    = 0.0
+        self.yaw      = 0.0
+        self.rate     = (0.0, 0.0, 0.0) # Latest (roll, pitch, yaw) rates (rad/s)
+        self.baseline = (0.0, 0.0, 0.0) # Orientation at the start of the current gesture
+        self.updated  = None            # Time (ns) of the latest sample
+
+    def update(self, gyroscope, accelerometer, time):
+        """
+        Fold in one sample.
+
+        Parameters:
+        -----------
+            gyroscope (`tuple`): x,y,z rotation rates (rad/s), None when the sensor is not ready.
+            accelerometer (`tuple`): x,y,z accelerations (m/s²), None when the sensor is not ready.
+            time (`int`): Time (ns) the sample was taken at, samples with the same time are not integrated.
+
+        Returns:
+        --------
+            None
+        """
+        dt = None if self.updated is None else (time - self.updated) / 1e9
+        self.updated = time
+        if dt is not None and (dt < 0 or dt > RESET_GAP):
+            dt = None
+
+        if gyroscope is not None:
+            gx, gy, gz = gyroscope
+            self.rate = (-gy, gx, gz)
+        else:
+            self.rate = (0.0, 0.0, 0.0)
+
+        if dt == 0:
+            # Only the rates of a sample taken at the same time as the previous one are kept
+            return
+
+        if dt is None:
+            # First sample after a gap, nothing to integrate
+            self.yaw = 0.0
+        else:
+            self.roll  += self.rate[0] * dt
+            self.pitch += self.rate[1] * dt
+            self.yaw   += self.rate[2] * dt
+
+        if accelerometer is not None:
+            ax, ay, az = accelerometer
+            roll  = math.atan2(ax, math.sqrt(ay * ay + az * az))
+            pitch = math.atan2(ay, math.sqrt(ax * ax + az * az))
+            weight = 0.0 if dt is None or gyroscope is None else self.tau / (self.tau + dt)
+            self.roll  = weight * self.roll  + (1 - weight) * roll
+            self.pitch = weight * self.pitch + (1 - weight) * pitch
+
+    def mark(self):
+        """
+        Take the current orientation as the baseline of a new gesture.
+        """
+        self.baseline = (self.roll, self.pitch, self.yaw)
+
+    def change(self, lookahead=0.0):
+        """
+        Returns the (roll, pitch, yaw) change since the baseline, extrapolated `lookahead` seconds ahead at the
+        current rates so a fast movement is recognized before the phone reaches its final orientation.
+        """
+        roll, pitch, yaw = self.baseline
+        return (self.roll  - roll  + self.rate[0] * lookahead,
+                self.pitch - pitch + self.rate[1] * lookahead,
+                self.yaw   - yaw   + self.rate[2] * lookahead)
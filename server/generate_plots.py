@@ -2,130 +2,127 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import glob
-import os
 import datetime as dt
+import collections
+import os
+import time
+
+import experiment_store
 
 def find_average(start, end):
     diff = start - end
     change = diff / start * 100
     return (start, end, change)
 
-def generate():
-    file_list = glob.glob('./experiments/*.csv')
-
-    # Fix for missing columns in the data
-    for file in file_list:
-        temp = pd.read_csv(file)
-        if 'Tab' not in temp.columns:
-            temp["Tab"] = "layout"
-            temp.loc[10:19,'Tab'] = "remote"
-            temp.loc[30:,'Tab'] = "remote"
-            temp.to_csv(file, index=False)
-        else: continue
-
-    main_dataframe = pd.DataFrame(pd.read_csv(file_list[0]))
-    main_dataframe.insert(2,'Date',os.path.basename(file_list[0])[:8])
-    main_dataframe.insert(2,'Timestamp',os.path.basename(file_list[0])[8:14])
-    for i in range(1,len(file_list)):
-        data = pd.read_csv(file_list[i])
-        data.insert(2,'Date',os.path.basename(file_list[i])[:8])
-        data.insert(2,'Timestamp',os.path.basename(file_list[i])[8:14])
-        df = pd.DataFrame(data)
-        main_dataframe = pd.concat([main_dataframe,df],axis=0)
+# (mode, tab) groups of every per-day statistic, in the order of the box plots
+GROUPS = [('speed', 'layout'), ('speed', 'remote'), ('interactive', 'layout'), ('interactive', 'remote')]
 
-    # Populating the data
-    dates = sorted(set(main_dataframe["Date"].to_numpy()))
-    x_values = list(dt.datetime.strptime(str(d),'%Y%m%d').date() for d in dates)
-
-    y_values_sl = []
-    y_values_sr = []
-    y_values_il = []
-    y_values_ir = []
+def aggregate_days(dataframe):
+    """
+    Compute the statistics of every day of `dataframe` with a single groupby over (date, mode, tab).
 
-    correct_sl = []
-    correct_sr = []
-    correct_il = []
-    correct_ir = []
+    Returns:
+    --------
+        days (`dict`): Per date (YYYYmmdd), the times of the correct tests, their average and the average number of
+                       correct tests per session for each (mode, tab), and the number of layout mistakes per action.
+    """
+    correct  = dataframe[dataframe['Correct']]
+    groups   = correct.groupby(['Date', 'Mode', 'Tab'], observed=True)['Time']
+    times    = {key: group.to_numpy() for key, group in groups}
+    sessions = correct.groupby('Date')['Timestamp'].nunique()
+    mistakes = dataframe[(dataframe['Tab'] == 'layout') & ~dataframe['Correct']].groupby(['Date', 'Required Action'], observed=True).size()
 
-    averages = []
+    days = {}
+    for date in sorted(set(dataframe['Date'])):
+        day_times = {group: times.get((date, *group), np.array([])) for group in GROUPS}
+        days[date] = {'times'    : day_times,
+                      'average'  : {group: np.average(values) if len(values) else np.nan for group, values in day_times.items()},
+                      'correct'  : {group: round(len(values) / sessions[date]) if date in sessions else 0 for group, values in day_times.items()},
+                      'mistakes' : mistakes[date].to_dict() if date in mistakes.index.get_level_values(0) else {}}
+    return days
 
-    for date in dates:
-        average_speed_per_day = []
+def load_days(store, cache_path):
+    """
+    Returns the per-day statistics of every session in the store, reusing the cached statistics of the days whose
+    records did not change. A day is recomputed when the hash of its records differs from the cached one, and the
+    hashes are only checked when the store's size or modification time changed.
+    """
+    import hashlib
+    import pickle
 
-        # Get the speed values of the tests for each date
-        time = main_dataframe[(main_dataframe['Date']==date) & main_dataframe['Correct']==True]
-        y_values_sl.append(time['Time'][(time['Mode']=='speed') & (time['Tab']=='layout')].to_numpy())
-        y_values_sr.append(time['Time'][(time['Mode']=='speed') & (time['Tab']=='remote')].to_numpy())
-        y_values_il.append(time['Time'][(time['Mode']=='interactive') & (time['Tab']=='layout')].to_numpy())
-        y_values_ir.append(time['Time'][(time['Mode']=='interactive') & (time['Tab']=='remote')].to_numpy())
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            cache = pickle.load(cache_file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        cache = {'source': None, 'days': {}}
 
-        average_speed_per_day.append(np.average(time['Time'][(time['Mode']=='speed') & (time['Tab']=='layout')].to_numpy()))
-        average_speed_per_day.append(np.average(time['Time'][(time['Mode']=='interactive') & (time['Tab']=='layout')].to_numpy()))
-        average_speed_per_day.append(np.average(time['Time'][(time['Mode']=='speed') & (time['Tab']=='remote')].to_numpy()))
-        average_speed_per_day.append(np.average(time['Time'][(time['Mode']=='interactive') & (time['Tab']=='remote')].to_numpy()))
+    stat   = os.stat(store.data_path)
+    source = (stat.st_size, stat.st_mtime_ns)
+    if cache['source'] == source:
+        return {date: day for date, (_, day) in cache['days'].items()}
 
-        averages.append(average_speed_per_day)
+    records = store.load()
+    dates   = records['session'].astype('datetime64[D]')
+    days    = {}
+    changed = np.zeros(len(records), dtype=bool)
+    for day in np.unique(dates):
+        date   = str(day).replace('-', '')
+        mask   = dates == day
+        digest = hashlib.sha1(records[mask].tobytes()).hexdigest()
+        cached = cache['days'].get(date)
+        if cached is not None and cached[0] == digest:
+            days[date] = cached
+        else:
+            days[date] = (digest, None)
+            changed   |= mask
 
-        # Get the average amount of results for each date
-        tests_num = len(set(time["Timestamp"].to_numpy()))
-        correct_sl.append(round(len(time[(time['Mode']=='speed') & (time['Tab']=='layout')].to_numpy())/tests_num))
-        correct_sr.append(round(len(time[(time['Mode']=='speed') & (time['Tab']=='remote')].to_numpy())/tests_num))
-        correct_il.append(round(len(time[(time['Mode']=='interactive') & (time['Tab']=='layout')].to_numpy())/tests_num))
-        correct_ir.append(round(len(time[(time['Mode']=='interactive') & (time['Tab']=='remote')].to_numpy())/tests_num))
+    # Only the records of new or changed days are decoded and aggregated
+    if changed.any():
+        for date, day in aggregate_days(store.to_dataframe(records[changed])).items():
+            days[date] = (days[date][0], day)
 
-    # Identify which part of the screen has the most mistakes
-    screen_left  = ['Stop', 'Play/Pause']
-    screen_right = ['Volume', 'Mute']
-    screen_upper = ['OK', 'ESC', 'Previous', 'Next']
+    with open(cache_path, 'wb') as cache_file:
+        pickle.dump({'source': source, 'days': days}, cache_file)
+    return {date: day for date, (_, day) in sorted(days.items())}
 
-    layout_experiments_mistakes = main_dataframe[(main_dataframe['Tab']=='layout') & (main_dataframe['Correct'] == False)]
-    layout_experiments_mistakes = layout_experiments_mistakes['Required Action'].value_counts()
-    screen_left_total = screen_right_total = screen_upper_total = screen_lower_total = 0
-    for i in range(0, len(layout_experiments_mistakes.index)):
-        if layout_experiments_mistakes.index[i] in screen_left:
-            screen_left_total+=layout_experiments_mistakes.values[i]
-        elif layout_experiments_mistakes.index[i] in screen_right:
-            screen_right_total+=layout_experiments_mistakes.values[i]
-        elif layout_experiments_mistakes.index[i] in screen_upper:
-            screen_upper_total+=layout_experiments_mistakes.values[i]
-        else:
-            screen_lower_total+=layout_experiments_mistakes.values[i]
-    
-    # Populate averages (mean) and percentage increase for each test
-    average_layout_speed = find_average(averages[0][0], averages[-1][0])
-    average_layout_inter = find_average(averages[0][1], averages[-1][1])
-    average_remote_speed = find_average(averages[0][2], averages[-1][2])
-    average_remote_inter = find_average(averages[0][3], averages[-1][3])
+# Figures written in batch mode, rendered from the inputs returned by `figure_inputs`
+FIGURES = ('Figure_1', 'Figure_2', 'Figure_3', 'Figure_4')
+FORMATS = ('png', 'svg')
 
-    # Create figure for all the speed values as boxplots
+def plot_speed(x_values, y_values):
+    # Create figure for all the speed values as boxplots, in the order of `GROUPS`
     fig = plt.figure(1, figsize=(12, 8))
     axs = fig.subplots(2, 2)
-    axs[0, 0].boxplot(y_values_sl, labels=x_values, showmeans=True)
-    axs[0, 0].set_title('Speed Mode - Layout')
-    axs[0, 1].boxplot(y_values_sr, labels=x_values, showmeans=True)
-    axs[0, 1].set_title('Speed Mode - Remote')
-    axs[1, 0].boxplot(y_values_il, labels=x_values, showmeans=True)
-    axs[1, 0].set_title('Interactive Mode - Layout')
-    axs[1, 1].boxplot(y_values_ir, labels=x_values, showmeans=True)
-    axs[1, 1].set_title('Interactive Mode - Remote')
+    for ax, values, title in zip(axs.flat, y_values, ['Speed Mode - Layout', 'Speed Mode - Remote',
+                                                       'Interactive Mode - Layout', 'Interactive Mode - Remote']):
+        ax.boxplot(values, showmeans=True)
+        ax.set_xticks(range(1, len(x_values) + 1), [str(x) for x in x_values])
+        ax.set_title(title)
 
     for ax in fig.get_axes():
         ax.label_outer()
         ax.set_ylim(0, 5)
+    return fig
 
+def plot_correct(x_values, correct):
     # Create figure for correct answers per day as a lineplot
     fig2 = plt.figure(2, figsize=(7, 6))
     ax2 = fig2.add_subplot(111)
-    ax2.plot(x_values, correct_sl, label="Speed-Layout")
-    ax2.plot(x_values, correct_sr, label="Speed-Remote")
-    ax2.plot(x_values, correct_il, label="Interactive-Layout")
-    ax2.plot(x_values, correct_ir, label="Interactive-Remote")
+    for values, label in zip(correct, ["Speed-Layout", "Speed-Remote", "Interactive-Layout", "Interactive-Remote"]):
+        ax2.plot(x_values, values, label=label)
 
     ax2.xaxis.set_major_locator(mdates.DayLocator(interval=1))
     ax2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
     ax2.set_title('Average correct answers per day')
     ax2.legend()
+    return fig2
+
+def plot_progress(averages):
+    # Populate averages (mean) and percentage increase for each test
+    average_layout_speed = find_average(averages[0][0], averages[-1][0])
+    average_layout_inter = find_average(averages[0][1], averages[-1][1])
+    average_remote_speed = find_average(averages[0][2], averages[-1][2])
+    average_remote_inter = find_average(averages[0][3], averages[-1][3])
 
     # Create figure for the percentage of speed increase through memory
     fig3 = plt.figure(3, figsize=(7, 6))
@@ -147,6 +144,25 @@ def generate():
     ax3.set_title('Average Time at the start and end of the experiments')
     ax3.set_xticks(x, labels)
     ax3.legend()
+    return fig3
+
+def plot_mistakes(mistakes):
+    # Identify which part of the screen has the most mistakes
+    screen_left  = ['Stop', 'Play/Pause']
+    screen_right = ['Volume', 'Mute']
+    screen_upper = ['OK', 'ESC', 'Previous', 'Next']
+
+    layout_experiments_mistakes = pd.Series(mistakes, dtype=int)
+    screen_left_total = screen_right_total = screen_upper_total = screen_lower_total = 0
+    for i in range(0, len(layout_experiments_mistakes.index)):
+        if layout_experiments_mistakes.index[i] in screen_left:
+            screen_left_total+=layout_experiments_mistakes.values[i]
+        elif layout_experiments_mistakes.index[i] in screen_right:
+            screen_right_total+=layout_experiments_mistakes.values[i]
+        elif layout_experiments_mistakes.index[i] in screen_upper:
+            screen_upper_total+=layout_experiments_mistakes.values[i]
+        else:
+            screen_lower_total+=layout_experiments_mistakes.values[i]
 
     # Show the most frequent mistakes
     fig4 = plt.figure(4, figsize=(7, 6))
@@ -155,8 +171,119 @@ def generate():
     axs4[0].set_title('Mistakes per interaction')
     axs4[1].bar(['Left', 'Right', 'Upper', 'Lower'], [screen_left_total, screen_right_total, screen_upper_total, screen_lower_total])
     axs4[1].set_title('Mistakes per part of the screen')
+    return fig4
+
+PLOTS = dict(zip(FIGURES, (plot_speed, plot_correct, plot_progress, plot_mistakes)))
+
+def figure_inputs(days):
+    """
+    Returns the arguments of the plot function of every figure, built from the per-day statistics. They only hold
+    plain values, so they can be hashed and sent to another process.
+    """
+    # Populating the data
+    dates = list(days)
+    x_values = list(dt.datetime.strptime(str(d),'%Y%m%d').date() for d in dates)
+
+    y_values = [[days[date]['times'][group] for date in dates] for group in GROUPS]
+    correct  = [[days[date]['correct'][group] for date in dates] for group in GROUPS]
+
+    # Averages per day in the order Layout-Speed, Layout-Interactive, Remote-Speed, Remote-Interactive
+    averages = [[days[date]['average'][group] for group in (GROUPS[0], GROUPS[2], GROUPS[1], GROUPS[3])] for date in dates]
+
+    mistakes = collections.Counter()
+    for date in dates:
+        mistakes.update(days[date]['mistakes'])
+
+    return {'Figure_1' : (x_values, y_values),
+            'Figure_2' : (x_values, correct),
+            'Figure_3' : (averages,),
+            'Figure_4' : (dict(mistakes.most_common()),)}
+
+def load_figure_inputs():
+    # Per-day statistics of every experiment session, only new sessions are aggregated
+    store = experiment_store.ExperimentStore('./experiments/experiments')
+    return figure_inputs(load_days(store, './experiments/experiments.cache'))
+
+def render(name, inputs, directory):
+    """
+    Render one figure with the non-interactive Agg backend and save it in every format of `FORMATS`.
+    """
+    plt.switch_backend('Agg')
+    fig = PLOTS[name](*inputs)
+    for extension in FORMATS:
+        fig.savefig(os.path.join(directory, name + '.' + extension))
+    plt.close(fig)
+    return name
+
+def render_batch(directory='./img', processes=None, timeout=300):
+    """
+    Write every figure to `directory` without a display. Figures render in parallel in a process pool, and a figure
+    whose inputs hash to the same value as when its files were written is skipped.
+
+    Parameters:
+    -----------
+        directory (`str`): Output directory, the hashes of the written figures are kept in its `figures.json`.
+        processes (`int`): Size of the process pool, the number of CPUs by default.
+        timeout (`float`): Seconds allowed to render all the figures, the pool is terminated after it.
+
+    Returns:
+    --------
+        rendered (`list`): Names of the rendered figures, the others were up to date.
+    """
+    import hashlib
+    import json
+    import multiprocessing
+    import pickle
+
+    manifest_path = os.path.join(directory, 'figures.json')
+    try:
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+    except (OSError, ValueError):
+        manifest = {}
+
+    digests = {}
+    for name, inputs in load_figure_inputs().items():
+        digest = hashlib.sha1(pickle.dumps(inputs)).hexdigest()
+        files  = [os.path.join(directory, name + '.' + extension) for extension in FORMATS]
+        if manifest.get(name) != digest or not all(os.path.exists(path) for path in files):
+            digests[name] = (digest, inputs)
+
+    rendered = []
+    if digests:
+        os.makedirs(directory, exist_ok=True)
+        deadline = time.monotonic() + timeout
+        with multiprocessing.Pool(min(processes or os.cpu_count(), len(digests))) as pool:
+            pending = [pool.apply_async(render, (name, inputs, directory)) for name, (_, inputs) in digests.items()]
+            for result in pending:
+                # Raises multiprocessing.TimeoutError past the deadline, leaving the pool to be terminated
+                name = result.get(max(deadline - time.monotonic(), 0))
+                manifest[name] = digests[name][0]
+                rendered.append(name)
+
+        with open(manifest_path + '.tmp', 'w') as manifest_file:
+            json.dump(manifest, manifest_file, indent=4, sort_keys=True)
+        os.replace(manifest_path + '.tmp', manifest_path)
+    return rendered
+
+def generate():
+    for name, inputs in load_figure_inputs().items():
+        PLOTS[name](*inputs)
 
     plt.show()
 
 if __name__ == "__main__":
-    generate()
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Plot the experiment results, from the reports directory")
+    parser.add_argument('--batch', action='store_true', help="Write the figures to files instead of showing them, no display needed")
+    parser.add_argument('--output', default='./img', help="Directory of the figures written in batch mode")
+    parser.add_argument('--processes', type=int, default=None, help="Figures rendered in parallel, the number of CPUs by default")
+    parser.add_argument('--timeout', type=float, default=300, help="Seconds allowed to render the figures in batch mode")
+    args = parser.parse_args()
+
+    if args.batch:
+        rendered = render_batch(args.output, args.processes, args.timeout)
+        print((", ".join(rendered) if rendered else "No figure") + " rendered to " + args.output)
+    else:
+        generate()
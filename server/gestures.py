@@ -0,0 +1,198 @@
+import math
+
+import numpy as np
+
+import ringbuffer
+
+# Index 0-3 of the classifier result
+TILT_CODES = np.array(['TL', 'TR', 'TU', 'TD'])
+
+_weights_cache = {}
+_weight_lists  = {}
+
+def smoothing_weights(length, alpha):
+    """
+    Returns the weights of an exponential moving average over a window of `length` samples, oldest first.
+    The weights sum to one and the latest sample has the largest weight; `alpha` = 1 keeps only the latest sample.
+    """
+    key = (length, alpha)
+    weights = _weights_cache.get(key)
+    if weights is None:
+        weights = alpha * (1 - alpha) ** np.arange(length - 1, -1, -1, dtype=np.float64)
+        weights[0] = (1 - alpha) ** (length - 1)
+        _weights_cache[key] = weights
+    return weights
+
+def tilt_weights(length, alpha):
+    """
+    Returns the weight of each sample of a window, oldest first, in the difference between its filtered latest
+    position and baseline, as a list. The difference can then be summed sample by sample as they arrive.
+    With 4 samples and `alpha` = 0.5 the weights are proportional to -3, -1, 1, 3, a least squares slope.
+    Windows of 2 or 3 samples, which the filter does not smooth, weigh their first and last samples -1 and 1.
+    """
+    key = (length, alpha)
+    weights = _weight_lists.get(key)
+    if weights is None:
+        if length < 4:
+            weights = [-1.0] + [0.0] * (length - 2) + [1.0]
+        else:
+            smoothing = smoothing_weights(length, alpha)
+            weights   = (smoothing - smoothing[::-1]).tolist()
+        _weight_lists[key] = weights
+    return weights
+
+def dominant_axis(dx, dy, hysteresis, previous):
+    if previous in ('TL', 'TR'):
+        return dx * hysteresis >= dy
+    if previous in ('TU', 'TD'):
+        return dx > dy * hysteresis
+    return dx > dy
+
+def classify_delta(delta_x, delta_y, hysteresis=1.25, previous=None):
+    """
+    Returns the tilt code of a filtered x,y difference, as summed with the `tilt_weights` of a window.
+    """
+    dx, dy = abs(delta_x), abs(delta_y)
+    if dx > dy if previous is None else dominant_axis(dx, dy, hysteresis, previous):
+        return 'TL' if delta_x > 0 else 'TR'
+    else:
+        return 'TU' if delta_y > 0 else 'TD'
+
+def early_tilt(delta_x, delta_y, margin):
+    """
+    Returns the tilt code of the difference between the first and latest samples of a gesture once its dominant
+    axis moved `margin` times more than the other, or None while the direction is unclear.
+    """
+    dx, dy = abs(delta_x), abs(delta_y)
+    if max(dx, dy) <= margin * min(dx, dy):
+        return None
+    return classify_delta(delta_x, delta_y)
+
+def classify_window(window, alpha, hysteresis, previous):
+    """
+    Single window path of `classify_tilt`. Windows of a handful of samples are summed in a plain loop over
+    the x,y columns, which is several times faster than the NumPy call overhead.
+    """
+    rows    = np.asarray(window)[:, :2].tolist()
+    weights = tilt_weights(len(rows), alpha)
+
+    delta_x = delta_y = 0.0
+    for weight, (x, y) in zip(weights, rows):
+        delta_x += weight * x
+        delta_y += weight * y
+    return classify_delta(delta_x, delta_y, hysteresis, previous)
+
+def classify_tilt(windows, alpha=0.6, hysteresis=1.25, previous=None):
+    """
+    Returns the phone's tilt gesture over one or many windows of recent samples.
+
+    Both ends of each window are low-pass filtered (an exponential moving average run forwards for the
+    latest position and backwards for the baseline), the dominant axis of their difference gives the
+    direction. The middle sample of a 3 sample window cancels out, so windows of 2 or 3 samples are not
+    smoothed and only compare their first and last samples. With hysteresis, the axis of the classification of
+    the previous window is kept unless the other axis moved `hysteresis` times more, so the overlapping
+    windows of one noisy diagonal tilt do not flip between the two.
+
+    Parameters:
+    -----------
+        windows (`ndarray`): (W, 3) window or (B, W, 3) batch of windows with the x,y,z values of one sensor, oldest first.
+        alpha (`float`): Smoothing factor of the low-pass filter in (0, 1], 1 compares the raw first and last samples.
+        hysteresis (`float`): Factor the other axis has to dominate by before the previous axis is abandoned.
+        previous (`str`): Previous tilt code, or an array of codes for a batch, None to disable hysteresis.
+
+    Returns:
+    --------
+        tilt (string): String representation of tilt, or an array of them for a batch. Possible values are:
+        * TU: Tilt Up
+        * TD: Tilt Down
+        * TR: Tilt Right
+        * TL: Tilt Left
+    """
+    if np.ndim(windows) == 2:
+        return classify_window(windows, alpha, hysteresis, previous)
+
+    windows  = np.asarray(windows, dtype=np.float64)
+    weights  = smoothing_weights(windows.shape[1], alpha)
+    latest   = np.tensordot(windows, weights, axes=([1], [0]))
+    baseline = np.tensordot(windows, weights[::-1], axes=([1], [0]))
+    delta    = latest - baseline
+
+    dx = np.abs(delta[:, 0])
+    dy = np.abs(delta[:, 1])
+    horizontal = dx > dy
+    if previous is not None:
+        previous   = np.asarray(previous)
+        horizontal = np.where(np.isin(previous, ('TL', 'TR')), dx * hysteresis >= dy,
+                     np.where(np.isin(previous, ('TU', 'TD')), dx > dy * hysteresis, horizontal))
+
+    index = np.where(horizontal, np.where(delta[:, 0] > 0, 0, 1), np.where(delta[:, 1] > 0, 2, 3))
+    return TILT_CODES[index]
+
+def classify_orientation(change, threshold, hysteresis=1.25, previous=None):
+    """
+    Returns the tilt or twist gesture given by the orientation change of a phone since the start of the gesture,
+    or None while the phone has not turned by `threshold` radians around any axis.
+
+    Parameters:
+    -----------
+        change (`tuple`): (roll, pitch, yaw) change in radians, as returned by `OrientationFilter.change`.
+        threshold (`float`): Smallest rotation (rad) recognized as a gesture.
+        hysteresis (`float`): Factor the other tilt axis has to dominate by before the previous axis is abandoned.
+        previous (`str`): Previous gesture code, None to disable hysteresis.
+
+    Returns:
+    --------
+        gesture (string): A tilt code of `classify_tilt`, or one of:
+        * WL: Twist Left (counterclockwise)
+        * WR: Twist Right (clockwise)
+    """
+    roll, pitch, yaw = change
+    dx, dy, dz = abs(roll), abs(pitch), abs(yaw)
+    if max(dx, dy, dz) < threshold:
+        return None
+    if dz > dx and dz > dy:
+        return 'WL' if yaw > 0 else 'WR'
+    if dominant_axis(dx, dy, hysteresis, previous):
+        return 'TL' if roll > 0 else 'TR'
+    else:
+        return 'TU' if pitch > 0 else 'TD'
+
+def tilt_angle(first, latest):
+    """
+    Returns the angle (rad) between two x,y,z vectors, e.g. the gravity measured at the start of a gesture and now,
+    or 0 when a sensor was not ready.
+    """
+    ax, ay, az = first
+    bx, by, bz = latest
+    norms = math.sqrt((ax * ax + ay * ay + az * az) * (bx * bx + by * by + bz * bz))
+    if not norms > 0:
+        return 0.0
+    return math.acos(max(-1.0, min(1.0, (ax * bx + ay * by + az * bz) / norms)))
+
+def rotation_angle(first, latest):
+    """
+    Returns the angle (rad) the phone turned between two rotation vectors, the x,y,z parts of unit quaternions,
+    or 0 when a sensor was not ready.
+    """
+    ax, ay, az = first
+    bx, by, bz = latest
+    aw = math.sqrt(max(0.0, 1.0 - (ax * ax + ay * ay + az * az)))
+    bw = math.sqrt(max(0.0, 1.0 - (bx * bx + by * by + bz * bz)))
+    dot = abs(ax * bx + ay * by + az * bz + aw * bw)
+    if dot != dot:
+        return 0.0
+    return 2.0 * math.acos(min(1.0, dot))
+
+def sliding_windows(samples, length, sensor=ringbuffer.ACCELEROMETER):
+    """
+    Returns every window of `length` consecutive samples of one sensor as a (B, length, 3) view, without copying.
+    Used to run `classify_tilt` offline over a recorded session.
+
+    Parameters:
+    -----------
+        samples (`ndarray`): (N, 10) sample rows as stored by `SampleRing`.
+        length (`int`): Number of samples per window.
+        sensor (`slice`): Columns of the sensor to classify.
+    """
+    values = np.asarray(samples)[:, sensor]
+    return np.lib.stride_tricks.sliding_window_view(values, length, axis=0).transpose(0, 2, 1)
@@ -0,0 +1,51 @@
+import time
+
+import core
+
+class HeadlessServer(core.ControlServer):
+    """
+    Server without a user interface, for a machine without a display or as a background service.
+    Interaction is enabled from the start and connection changes are printed to the console.
+    """
+
+    def __init__(self, *args, report_interval=0, **kwargs):
+        super().__init__(*args, active=True, **kwargs)
+        self.report_interval = report_interval
+
+    def on_connect(self, session):
+        print("Connected:", session.address[0], "(" + self.describe_clients() + ")")
+
+    def on_disconnect(self, session):
+        stats = session.sequencer.stats()
+        print("Disconnected:", session.address[0], "(" + self.describe_clients() + ") | " + str(stats['accepted']) + " samples, " +
+              str(stats['lost']) + " lost, " + str(stats['reordered']) + " reordered, " + str(stats['duplicates']) + " duplicates, " +
+              "jitter " + str(round(stats['jitter'] * 1000, 1)) + " ms")
+
+    def on_warning(self, message):
+        print("Sensor Warning:", message)
+
+    def report(self):
+        print(str(self.receiver.received) + " received | " + str(self.receiver.dropped) + " dropped | " +
+              "Queue: " + str(self.executor.depth) + " | Latency: " + str(round(self.executor.last_latency * 1000, 1)) + " ms")
+
+    def serve_forever(self):
+        """
+        Block the calling thread until interrupted with Ctrl+C, printing the counters every `report_interval` seconds.
+        """
+        self.start()
+        try:
+            while True:
+                time.sleep(self.report_interval or 3600)
+                if self.report_interval:
+                    self.report()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+if __name__ == "__main__":
+    parser = core.argument_parser("Sensor media control server without user interface")
+    parser.add_argument('--report-interval', type=float, default=0, help="Seconds between counter reports, 0 to disable")
+    args = parser.parse_args()
+
+    HeadlessServer(report_interval=args.report_interval, **core.server_options(args)).serve_forever()
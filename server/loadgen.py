@@ -0,0 +1,128 @@
+import argparse
+import heapq
+import math
+import random
+import socket
+import time
+
+import protocol
+
+REGIONS = ('LS', 'RS', 'TS', 'BS')
+
+# Commands of the remote tab as sent by the client
+COMMANDS = ('Play', 'Pause', 'Previous', 'Next', 'Stop', 'Volume+', 'Volume-', 'Seek+', 'Seek-',
+            'Scroll UP', 'Scroll DOWN', 'Mute', 'Unmute', 'OK', 'ESC')
+
+class Phone:
+    """
+    Simulated client device with its own socket, so the server sees it as a separate session. A layout phone
+    holds a random region for `gesture_length` packets while tilting in a random direction, then picks another
+    one; a remote phone sends a random command per packet.
+    """
+
+    def __init__(self, mode='layout', rate=5.0, jitter=0.0, loss=0.0, binary=False, gesture_length=10, seed=None):
+        self.mode           = mode
+        self.rate           = rate
+        self.jitter         = jitter
+        self.loss           = loss
+        self.binary         = binary
+        self.gesture_length = gesture_length
+        self.random         = random.Random(seed)
+        self.sock           = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+        self.sample = 0
+        self.sent   = 0
+        self.lost   = 0
+
+    def interval(self):
+        """
+        Seconds until the next packet, the nominal period varied by up to +/- `jitter` of itself.
+        """
+        return 1 / self.rate * (1 + self.random.uniform(-self.jitter, self.jitter))
+
+    def packet(self):
+        if self.mode == 'remote':
+            return self.random.choice(COMMANDS).encode('utf-8')
+
+        step = self.sample % self.gesture_length
+        if step == 0:
+            self.region = self.random.choice(REGIONS)
+            self.angle  = self.random.choice((0, 0.5, 1, 1.5)) * math.pi
+        tilt          = step * 0.3
+        accelerometer = (tilt * math.cos(self.angle), tilt * math.sin(self.angle), 9.8)
+        gyroscope     = (self.random.gauss(0, 0.01), self.random.gauss(0, 0.01), self.random.gauss(0, 0.01))
+        rotation      = (0.1, 0.2, 0.3)
+        timestep      = float(time.strftime("%H%M%S"))
+        self.sample  += 1
+
+        if self.binary:
+            return protocol.encode_layout_packet(timestep, self.region, gyroscope, accelerometer, rotation)
+        return protocol.encode_text_packet(int(timestep), self.region, gyroscope, accelerometer, rotation)
+
+    def send(self, target):
+        message = self.packet()
+        if self.loss and self.random.random() < self.loss:
+            self.lost += 1
+            return
+        self.sock.sendto(message, target)
+        self.sent += 1
+
+def create_phones(layout=1, remote=0, rate=5.0, jitter=0.0, loss=0.0, binary=False, seed=None):
+    seeds = random.Random(seed)
+    return ([Phone('layout', rate, jitter, loss, binary, seed=seeds.random()) for _ in range(layout)] +
+            [Phone('remote', rate, jitter, loss, binary, seed=seeds.random()) for _ in range(remote)])
+
+def run(phones, target, duration):
+    """
+    Send packets from every phone at its own rate for `duration` seconds, from a single thread.
+
+    Parameters:
+    -----------
+        phones (`list`): Simulated phones.
+        target (`tuple`): (host, port) of the server.
+        duration (`float`): Seconds to send for.
+
+    Returns:
+    --------
+        totals (`dict`): Packets sent and deliberately lost, and the actual duration.
+    """
+    start    = time.perf_counter()
+    end      = start + duration
+    schedule = [(start + phone.random.uniform(0, 1 / phone.rate), index) for index, phone in enumerate(phones)]
+    heapq.heapify(schedule)
+
+    while schedule:
+        due, index = schedule[0]
+        if due >= end:
+            break
+        delay = due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        phone = phones[index]
+        phone.send(target)
+        heapq.heapreplace(schedule, (due + phone.interval(), index))
+
+    return {'sent'     : sum(phone.sent for phone in phones),
+            'lost'     : sum(phone.lost for phone in phones),
+            'duration' : time.perf_counter() - start}
+
+def argument_parser():
+    parser = argparse.ArgumentParser(description="Simulate phones sending sensor packets to the server")
+    parser.add_argument('--host', default='127.0.0.1', help="Server address")
+    parser.add_argument('--port', type=int, default=50000, help="Server UDP port")
+    parser.add_argument('--phones', type=int, default=1, help="Number of phones using the layout tab")
+    parser.add_argument('--remote-phones', type=int, default=0, help="Number of phones using the remote tab")
+    parser.add_argument('--rate', type=float, default=5.0, help="Packets per second of each phone (the app sends ~5)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random variation of the packet interval, as a fraction of it")
+    parser.add_argument('--loss', type=float, default=0.0, help="Probability of dropping a packet instead of sending it")
+    parser.add_argument('--binary', action='store_true', help="Send binary layout packets instead of CSV text")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds to send for")
+    parser.add_argument('--seed', type=int, default=None, help="Seed of the random gestures, commands, jitter and loss")
+    return parser
+
+if __name__ == "__main__":
+    args   = argument_parser().parse_args()
+    phones = create_phones(args.phones, args.remote_phones, args.rate, args.jitter, args.loss, args.binary, args.seed)
+    totals = run(phones, (args.host, args.port), args.duration)
+    print(str(totals['sent']) + " packets sent (" + str(round(totals['sent'] / totals['duration'])) + " per second), "
+          + str(totals['lost']) + " lost on purpose")
@@ -0,0 +1,142 @@
+import bisect
+import http.server
+import json
+import threading
+
+# Upper bounds (ns) of the histogram buckets, 1-2.5-5 steps from 1 µs to 1 s. Anything slower goes to +Inf
+BUCKETS = tuple(int(mantissa * 10 ** exponent) for exponent in range(3, 9) for mantissa in (1, 2.5, 5)) + (1000000000,)
+
+# Stages of the packet to action pipeline, in order
+STAGES = ('receive', 'decode', 'tilt', 'lookup', 'queue', 'action', 'end_to_end')
+
+class Histogram:
+    """
+    Fixed-bucket histogram of durations in ns. Observing costs one bisect and three additions, quantiles are
+    estimated from the bucket bounds.
+    """
+
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count  = 0
+        self.sum    = 0
+        self.max    = 0
+
+    def observe(self, value, count=1):
+        """
+        Record `count` observations of `value` ns, e.g. the average duration of each packet of a batch.
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += count
+        self.count += count
+        self.sum   += value * count
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """
+        Returns an estimate (ns) of the `q` quantile, interpolated linearly within its bucket and capped by the maximum.
+        """
+        if self.count == 0:
+            return 0
+        rank  = q * self.count
+        seen  = 0
+        lower = 0
+        for bound, count in zip(self.bounds, self.counts):
+            if count and seen + count >= rank:
+                return min(lower + (bound - lower) * (rank - seen) / count, self.max)
+            seen += count
+            lower = bound
+        return self.max
+
+    def snapshot(self):
+        return {'count' : self.count,
+                'sum'   : self.sum,
+                'max'   : self.max,
+                'p50'   : self.quantile(0.5),
+                'p99'   : self.quantile(0.99),
+                'buckets' : dict(zip([str(bound) for bound in self.bounds] + ['+Inf'], self.counts))}
+
+class Metrics:
+    """
+    Per-stage duration histograms of the packet to action pipeline, plus the counters of other components
+    (receiver, action executor) read through `sources` when a snapshot is taken. The server only creates it
+    when metrics are enabled; otherwise the instrumented code skips the clock reads altogether.
+    """
+
+    def __init__(self, stages=STAGES):
+        self.histograms = {stage: Histogram() for stage in stages}
+        self.sources    = {}
+
+    def observe(self, stage, value, count=1):
+        self.histograms[stage].observe(value, count)
+
+    def add_source(self, name, stats):
+        """
+        Include the counters returned by `stats()` in every snapshot, under `name`.
+        """
+        self.sources[name] = stats
+
+    def snapshot(self):
+        """
+        Returns the histograms and counters as a JSON serializable dictionary.
+        """
+        return {'histograms' : {stage: histogram.snapshot() for stage, histogram in self.histograms.items()},
+                'counters'   : {name: stats() for name, stats in self.sources.items()}}
+
+    def prometheus(self):
+        """
+        Returns the metrics in the Prometheus text exposition format, durations in seconds.
+        """
+        lines = ['# TYPE sensor_stage_seconds histogram']
+        for stage, histogram in self.histograms.items():
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append('sensor_stage_seconds_bucket{stage="%s",le="%g"} %d' % (stage, bound / 1e9, cumulative))
+            lines.append('sensor_stage_seconds_bucket{stage="%s",le="+Inf"} %d' % (stage, histogram.count))
+            lines.append('sensor_stage_seconds_sum{stage="%s"} %.9f' % (stage, histogram.sum / 1e9))
+            lines.append('sensor_stage_seconds_count{stage="%s"} %d' % (stage, histogram.count))
+
+        for name, stats in self.sources.items():
+            for key, value in stats().items():
+                if isinstance(value, (int, float)):
+                    lines.append('sensor_%s_%s %s' % (name, key, value))
+        return '\n'.join(lines) + '\n'
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        metrics = self.server.metrics
+        if self.path == '/metrics':
+            body, content_type = metrics.prometheus(), 'text/plain; version=0.0.4'
+        elif self.path == '/metrics.json':
+            body, content_type = json.dumps(metrics.snapshot()), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class MetricsExporter:
+    """
+    Serves `/metrics` (Prometheus text) and `/metrics.json` (snapshot) over HTTP on a background thread.
+    Bound to localhost by default.
+    """
+
+    def __init__(self, metrics, port, host='127.0.0.1'):
+        self.httpd         = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+        self.httpd.metrics = metrics
+        self.thread        = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
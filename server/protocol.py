@@ -0,0 +1,155 @@
+import struct
+
+# Binary layout packet (version 1), little endian, 52 bytes:
+#   magic (2s) | version (B) | flags (B) | region (2s) | pad (2x) | timestep (d) | gyroscope, accelerometer, rotation (9f)
+PACKET_MAGIC   = b'SM'
+PACKET_VERSION = 1
+LAYOUT_PACKET  = struct.Struct('<2sBB2s2xd9f')
+
+# Bits of the flags byte marking a sensor that is not available on the client
+GYROSCOPE_NOT_READY     = 0x01
+ACCELEROMETER_NOT_READY = 0x02
+ROTATION_NOT_READY      = 0x04
+
+NOT_READY = 'not_ready'
+
+LAYOUT = 'layout'
+REMOTE = 'remote'
+
+NAN = float('nan')
+
+def decode_parameter(value):
+    if value == NOT_READY:
+        return value
+    else:
+        return float(value)
+
+def decode_text(message_string):
+    """
+    Decode a CSV text packet as sent by the Android client.
+
+    Parameters:
+    -----------
+        message_string (`str`): Decoded datagram, either 12 comma separated fields (layout) or a single command (remote).
+
+    Returns:
+    --------
+        packet (`tuple`): Pair of control type and decoded data, or None if the packet is not recognized.
+    """
+    fields = message_string.replace(' ','').split(",")
+
+    if len(fields) == 12:
+        data = {}
+        data['Timestep']      = float(fields[0])
+        data['Action']        = fields[1]
+        data['Gyroscope']     = {'x': decode_parameter(fields[2]), 'y': decode_parameter(fields[3]), 'z': decode_parameter(fields[4])}
+        data['Accelerometer'] = {'x': decode_parameter(fields[5]), 'y': decode_parameter(fields[6]), 'z': decode_parameter(fields[7])}
+        data['Rotation']      = {'x': decode_parameter(fields[8]), 'y': decode_parameter(fields[9]), 'z': decode_parameter(fields[10])}
+        return LAYOUT, data
+    elif len(fields) == 1 and fields[0]:
+        return REMOTE, fields
+    return None
+
+def decode_binary(message):
+    """
+    Decode a fixed-layout binary packet with a single precompiled unpack.
+
+    Parameters:
+    -----------
+        message (`bytes`): Raw datagram starting with `PACKET_MAGIC`.
+
+    Returns:
+    --------
+        packet (`tuple`): Pair of control type and decoded data, or None if the size or version do not match.
+    """
+    if len(message) != LAYOUT_PACKET.size:
+        return None
+
+    _, version, flags, region, timestep, gx, gy, gz, ax, ay, az, rx, ry, rz = LAYOUT_PACKET.unpack(message)
+    if version != PACKET_VERSION:
+        return None
+
+    data = {}
+    data['Timestep']      = timestep
+    data['Action']        = region.decode('ascii')
+    data['Gyroscope']     = {'x': NOT_READY, 'y': NOT_READY, 'z': NOT_READY} if flags & GYROSCOPE_NOT_READY else {'x': gx, 'y': gy, 'z': gz}
+    data['Accelerometer'] = {'x': NOT_READY, 'y': NOT_READY, 'z': NOT_READY} if flags & ACCELEROMETER_NOT_READY else {'x': ax, 'y': ay, 'z': az}
+    data['Rotation']      = {'x': NOT_READY, 'y': NOT_READY, 'z': NOT_READY} if flags & ROTATION_NOT_READY else {'x': rx, 'y': ry, 'z': rz}
+    return LAYOUT, data
+
+def decode_packet(message):
+    """
+    Decode a raw datagram of any supported format (binary layout, 12-field CSV layout or 1-field CSV remote).
+
+    Parameters:
+    -----------
+        message (`bytes`): Raw datagram read from the UDP socket.
+
+    Returns:
+    --------
+        packet (`tuple`): Pair of control type (`LAYOUT` or `REMOTE`) and decoded data, or None for malformed packets.
+    """
+    try:
+        if message[:2] == PACKET_MAGIC:
+            return decode_binary(message)
+        return decode_text(str(message, 'utf-8'))
+    except (ValueError, UnicodeDecodeError, struct.error):
+        return None
+
+def sample_values(data):
+    """
+    Flatten the sensor triplets of a decoded layout packet in gyroscope, accelerometer, rotation order.
+    Sensors that are not ready are returned as NaN.
+    """
+    values = []
+    for sensor in ('Gyroscope', 'Accelerometer', 'Rotation'):
+        triplet = data[sensor]
+        if triplet['x'] == NOT_READY:
+            values += (NAN, NAN, NAN)
+        else:
+            values += (triplet['x'], triplet['y'], triplet['z'])
+    return values
+
+def timestep_seconds(timestep):
+    """
+    Convert a client timestep, the phone's time of day as HHmmss (e.g. 142305.25), to seconds since midnight.
+    """
+    hours, rest   = divmod(timestep, 10000)
+    minutes, secs = divmod(rest, 100)
+    return hours * 3600 + minutes * 60 + secs
+
+def encode_text_packet(timestep, region, gyroscope=None, accelerometer=None, rotation=None):
+    """
+    Encode a layout packet in the CSV text format of the Android client. A sensor passed as None is sent as not ready.
+    """
+    values = []
+    for sensor in (gyroscope, accelerometer, rotation):
+        values += (NOT_READY,) * 3 if sensor is None else sensor
+    return (",".join(str(value) for value in (timestep, region, *values)) + ",").encode('utf-8')
+
+def encode_layout_packet(timestep, region, gyroscope=None, accelerometer=None, rotation=None):
+    """
+    Encode a binary layout packet. A sensor passed as None is flagged as not ready.
+
+    Parameters:
+    -----------
+        timestep (`float`): Client time of day as HHmmss, with an optional fraction of a second.
+        region (`str`): Two letter screen region code (LS, RS, TS or BS).
+        gyroscope, accelerometer, rotation (`tuple`): x, y, z values of each sensor.
+
+    Returns:
+    --------
+        packet (`bytes`): Encoded datagram.
+    """
+    flags = 0
+    if gyroscope is None:
+        flags |= GYROSCOPE_NOT_READY
+        gyroscope = (0.0, 0.0, 0.0)
+    if accelerometer is None:
+        flags |= ACCELEROMETER_NOT_READY
+        accelerometer = (0.0, 0.0, 0.0)
+    if rotation is None:
+        flags |= ROTATION_NOT_READY
+        rotation = (0.0, 0.0, 0.0)
+    return LAYOUT_PACKET.pack(PACKET_MAGIC, PACKET_VERSION, flags, region.encode('ascii'), timestep,
+                              *gyroscope, *accelerometer, *rotation)
@@ -0,0 +1,126 @@
+import select
+import socket
+import struct
+import time
+
+# Linux only: ask the kernel to attach its cumulative drop count to every datagram
+SO_RXQ_OVFL = getattr(socket, 'SO_RXQ_OVFL', 40)
+DROP_COUNT  = struct.Struct('=I')
+
+# Windows reports a datagram larger than the buffer as this error instead of the MSG_TRUNC flag
+WSAEMSGSIZE = 10040
+
+class DatagramReceiver:
+    """
+    Drains every pending datagram of a UDP socket in one wakeup into a preallocated buffer pool.
+    The returned memoryviews point into the pool and are only valid until the next call to `recv_batch`.
+    """
+
+    def __init__(self, sock, batch_size=64, buffer_size=1024, rcvbuf=None):
+        self.sock        = sock
+        self.batch_size  = batch_size
+        self.buffer_size = buffer_size
+
+        if rcvbuf:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+        self.rcvbuf = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        self.sock.setblocking(False)
+
+        self.buffers = [bytearray(buffer_size) for _ in range(batch_size)]
+        self.views   = [memoryview(buffer) for buffer in self.buffers]
+
+        # Kernel drop counters are only available through recvmsg on Linux
+        self.track_kernel_drops = False
+        if hasattr(self.sock, 'recvmsg_into'):
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+                self.track_kernel_drops = True
+            except OSError:
+                pass
+        self.ancillary_size = socket.CMSG_SPACE(DROP_COUNT.size) if self.track_kernel_drops else 0
+
+        self.received       = 0
+        self.batches        = 0
+        self.largest_batch  = 0
+        self.truncated      = 0
+        self.malformed      = 0
+        self.kernel_dropped = 0
+        self.resets         = 0 # ICMP port unreachable reports (WSAECONNRESET on Windows), no datagram is lost
+        self.errors         = 0 # Other receive errors
+        self.drain_time     = 0 # Time (ns) spent reading the last batch from the socket, without the wait
+
+    def wait(self, timeout=None):
+        """
+        Block until at least one datagram is pending or the timeout expires.
+        """
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        return bool(readable)
+
+    def recv_batch(self, timeout=None):
+        """
+        Wait for the socket to become readable and read all pending datagrams, up to `batch_size`.
+
+        Parameters:
+        -----------
+            timeout (`float`): Seconds to wait for the first datagram, None to wait forever.
+
+        Returns:
+        --------
+            batch (`list`): Pairs of (memoryview, address) in arrival order.
+        """
+        if not self.wait(timeout):
+            return []
+
+        start = time.perf_counter_ns()
+        batch = []
+        for view in self.views:
+            try:
+                if self.track_kernel_drops:
+                    nbytes, ancdata, flags, address = self.sock.recvmsg_into([view], self.ancillary_size)
+                    for level, kind, value in ancdata:
+                        if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL:
+                            self.kernel_dropped = DROP_COUNT.unpack_from(value)[0]
+                    if flags & socket.MSG_TRUNC:
+                        self.truncated += 1
+                        continue
+                else:
+                    nbytes, address = self.sock.recvfrom_into(view)
+            except (BlockingIOError, InterruptedError):
+                break
+            except ConnectionResetError:
+                # A previous datagram sent from this socket was refused, nothing was received
+                self.resets += 1
+                continue
+            except OSError as error:
+                if getattr(error, 'winerror', None) == WSAEMSGSIZE:
+                    self.truncated += 1
+                else:
+                    self.errors += 1
+                continue
+            batch.append((view[:nbytes], address))
+
+        self.drain_time = time.perf_counter_ns() - start
+        self.received += len(batch)
+        self.batches  += 1
+        if len(batch) > self.largest_batch:
+            self.largest_batch = len(batch)
+        return batch
+
+    @property
+    def dropped(self):
+        return self.truncated + self.malformed + self.kernel_dropped
+
+    def stats(self):
+        """
+        Returns a snapshot of the receive counters.
+        """
+        return {'received'       : self.received,
+                'batches'        : self.batches,
+                'largest_batch'  : self.largest_batch,
+                'truncated'      : self.truncated,
+                'malformed'      : self.malformed,
+                'kernel_dropped' : self.kernel_dropped,
+                'dropped'        : self.dropped,
+                'resets'         : self.resets,
+                'errors'         : self.errors,
+                'rcvbuf'         : self.rcvbuf}
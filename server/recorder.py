@@ -0,0 +1,74 @@
+import mmap
+import socket
+import struct
+
+# Session log: a file header, then one record per datagram, little endian:
+#   file:   magic (5s) | version (B) | pad (2x)
+#   record: receive time in monotonic ns (q) | IPv4 address (4s) | port (H) | length (H) | datagram (length bytes)
+LOG_MAGIC   = b'SMLOG'
+LOG_VERSION = 1
+LOG_HEADER  = struct.Struct('<5sB2x')
+RECORD      = struct.Struct('<q4sHH')
+
+class SessionRecorder:
+    """
+    Appends every raw datagram handed to the server, with its receive time and source address, to a session
+    log. Records are buffered and written once per batch; a log cut short by a crash is read up to its last
+    complete record.
+    """
+
+    def __init__(self, path):
+        self.path     = path
+        self.file     = open(path, 'ab')
+        self.recorded = 0
+        if self.file.tell() == 0:
+            self.file.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION))
+
+    def write_batch(self, batch, received_time):
+        """
+        Append a batch of (datagram, address) pairs received at `received_time` (monotonic ns).
+        """
+        parts = []
+        for message, address in batch:
+            parts.append(RECORD.pack(received_time, socket.inet_aton(address[0]), address[1], len(message)))
+            parts.append(message)
+        self.file.write(b''.join(parts))
+        self.recorded += len(batch)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+class SessionLog:
+    """
+    Read-only view of a session log through a memory map. Iterating yields (receive time, datagram, address)
+    with the datagram as a memoryview into the map, so nothing is copied.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map  = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+
+        magic, version = LOG_HEADER.unpack_from(self.map, 0)
+        if magic != LOG_MAGIC or version != LOG_VERSION:
+            raise ValueError(path + " is not a session log (version " + str(LOG_VERSION) + ")")
+
+    def __iter__(self):
+        offset = LOG_HEADER.size
+        size   = len(self.map)
+        while offset + RECORD.size <= size:
+            received_time, ip, port, length = RECORD.unpack_from(self.map, offset)
+            start = offset + RECORD.size
+            if start + length > size:
+                break
+            yield received_time, self.view[start:start + length], (socket.inet_ntoa(ip), port)
+            offset = start + length
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+        self.file.close()
@@ -0,0 +1,97 @@
+import argparse
+import time
+
+import core
+import recorder
+import backends
+
+class ReplayCounters:
+    """
+    Stands in for the receiver of a live server, with the counters the pipeline updates.
+    """
+
+    def __init__(self):
+        self.received  = 0
+        self.malformed = 0
+
+    @property
+    def dropped(self):
+        return self.malformed
+
+    def stats(self):
+        return {'received': self.received, 'malformed': self.malformed, 'dropped': self.dropped}
+
+def replay(server, log, speed=None):
+    """
+    Feed the datagrams of a session log to the decode, gesture and dispatch pipeline of `server`, which is not
+    started (no socket is opened). The idle timeouts are emulated from the recorded receive times and the pipeline
+    times the packets with them, so gestures are released, actions repeated and clients disconnected as they were
+    live, whatever the replay speed.
+
+    Parameters:
+    -----------
+        server (`ControlServer`): Server whose executor is running.
+        log (`SessionLog`): Recorded session.
+        speed (`float`): Replay speed relative to real time (1 = as recorded), None for as fast as possible.
+
+    Returns:
+    --------
+        replayed (`int`): Number of datagrams fed to the server.
+    """
+    server.reset_connection()
+    server.receiver = ReplayCounters()
+
+    last_seen = {} # Recorded receive time of the latest datagram of each address
+    first = started = None
+    replayed = 0
+    for received_time, message, address in log:
+        if first is None:
+            first, started = received_time, time.monotonic_ns()
+        elif speed:
+            delay = started + (received_time - first) / speed - time.monotonic_ns()
+            if delay > 0:
+                time.sleep(delay / core.NS)
+
+        session = server.sessions.get(address)
+        if session is not None:
+            idle = received_time - last_seen[address]
+            if idle >= server.DISCONNECT_TIMEOUT * core.NS:
+                server.disconnect(session)
+            elif idle >= session.release_timeout * core.NS:
+                server.release_interaction(session)
+
+        server.receiver.received += 1
+        # Packets are timed on the recorded clock, so the release timeouts and action repeats are the live ones
+        server.handle_batch([(message, address)], time.monotonic_ns(), timeline=received_time)
+        last_seen[address] = received_time
+        replayed += 1
+    return replayed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the server pipeline")
+    parser.add_argument('log', help="Session log written with --record")
+    parser.add_argument('--speed', type=float, default=None, help="Replay speed relative to real time, as fast as possible by default")
+    parser.add_argument('--backend', choices=list(backends.BACKENDS), default='recording', help="Output backend, the recording backend does not touch the system")
+    parser.add_argument('--settings', default='./server/settings.json', help="Region to action settings file")
+    args = parser.parse_args()
+
+    # Replayed as fast as possible, actions are submitted faster than they run, the unbounded queue keeps all of them
+    server = core.ControlServer(host='', port=0, action_queue=None, backend=args.backend, settings_path=args.settings, active=True,
+                                metrics_enabled=True)
+    server.executor.start()
+    log = recorder.SessionLog(args.log)
+
+    start    = time.perf_counter()
+    replayed = replay(server, log, speed=args.speed)
+    elapsed  = time.perf_counter() - start
+    while server.executor.depth:
+        time.sleep(0.01)
+    server.shutdown()
+    log.close()
+
+    print(str(replayed) + " datagrams replayed in " + str(round(elapsed, 3)) + " s (" + str(round(replayed / elapsed)) + " per second), "
+          + str(server.executor.executed) + " actions executed")
+    for stage, histogram in server.metrics.histograms.items():
+        if histogram.count:
+            print("  " + stage.ljust(12) + str(histogram.count).rjust(8) + "  p50 " + str(round(histogram.quantile(0.5) / 1000, 1)) + " us"
+                  + "  p99 " + str(round(histogram.quantile(0.99) / 1000, 1)) + " us")
@@ -0,0 +1,85 @@
+import numpy as np
+
+# Columns of a sample row
+TIMESTEP      = 0
+GYROSCOPE     = slice(1, 4)
+ACCELEROMETER = slice(4, 7)
+ROTATION      = slice(7, 10)
+COLUMNS       = 10
+
+SENSORS = {'Gyroscope': GYROSCOPE, 'Accelerometer': ACCELEROMETER, 'Rotation': ROTATION}
+
+class SampleRing:
+    """
+    Fixed capacity ring buffer of the most recent sensor samples of a session, stored as float32 rows of
+    (timestep, gyroscope x,y,z, accelerometer x,y,z, rotation x,y,z). Sensors that are not ready are stored as NaN.
+
+    Every row is written twice, `capacity` rows apart, so the latest `n` samples are always contiguous in memory
+    and `window` can return a view instead of a copy. Memory use stays the same however long a session runs.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.data     = np.zeros((2 * capacity, COLUMNS), dtype=np.float32)
+        self.head     = 0    # Index of the next row to write
+        self.count    = 0    # Number of valid samples
+        self.origin   = None # Timesteps are stored relative to the first sample to keep float32 precision
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestep, values):
+        """
+        Write a sample in place.
+
+        Parameters:
+        -----------
+            timestep (`float`): Client timestep of the sample.
+            values (`tuple`): Nine sensor values in gyroscope, accelerometer, rotation order.
+
+        Returns:
+        --------
+            None
+        """
+        if self.origin is None:
+            self.origin = timestep
+        row = (timestep - self.origin, *values)
+        self.data[self.head] = row
+        self.data[self.head + self.capacity] = row
+
+        self.head += 1
+        if self.head == self.capacity:
+            self.head = 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def window(self, n=None):
+        """
+        Returns a read-only view of the latest `n` samples (all of them when None), oldest first.
+        The view is only valid until the ring wraps around, copy it to keep it longer.
+        """
+        if n is None or n > self.count:
+            n = self.count
+        end  = self.head + self.capacity
+        view = self.data[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def latest(self):
+        """
+        Returns a view of the most recent sample, or None if the ring is empty.
+        """
+        if self.count == 0:
+            return None
+        return self.data[self.head + self.capacity - 1]
+
+    def timesteps(self, n=None):
+        """
+        Returns the absolute client timesteps of the latest `n` samples.
+        """
+        return self.window(n)[:, TIMESTEP].astype(np.float64) + (self.origin or 0.0)
+
+    def clear(self):
+        self.head   = 0
+        self.count  = 0
+        self.origin = None
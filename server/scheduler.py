@@ -0,0 +1,56 @@
+class AdaptiveScheduler:
+    """
+    Measures the packet interval of every client session and derives from it when a held gesture is released and
+    when a repeated action is due.
+
+    As TCP does for round trip times, exponentially weighted moving averages of the interval and of its deviation
+    are kept, and the release timeout is the average interval plus `deviations` times the deviation, with at least
+    `margin` of the interval to spare. A phone sending quickly is released soon after it stops, while a slow or
+    jittery network widens the timeout instead of releasing the gesture between two late packets.
+
+    Parameters:
+    -----------
+        gain (`float`): Weight of a new interval in its average.
+        deviation_gain (`float`): Weight of a new deviation in its average.
+        deviations (`float`): Deviations added to the average interval for the release timeout.
+        margin (`float`): Smallest part of the average interval added for the release timeout.
+        minimum (`float`): Shortest release timeout (sec).
+        maximum (`float`): Longest release timeout (sec), longer pauses are not measured as intervals.
+    """
+
+    def __init__(self, gain=0.125, deviation_gain=0.25, deviations=4, margin=0.1, minimum=0.05, maximum=1.0):
+        self.gain           = gain
+        self.deviation_gain = deviation_gain
+        self.deviations     = deviations
+        self.margin         = margin
+        self.minimum        = minimum
+        self.maximum        = maximum
+
+    def observe(self, session, time):
+        """
+        Measure the interval between the previous packet of `session` and one received at `time` (ns), before
+        the packet is handled.
+        """
+        previous, session.packet_time = session.packet_time, time
+
+        # Only intervals within a gesture are packet intervals, the phone does not send between gestures
+        if previous is None or not (session.active_interaction or session.gesture_samples):
+            return
+        interval = (time - previous) / 1e9
+        # Packets of the same batch arrived together, their interval is unknown
+        if interval <= 0 or interval >= self.maximum:
+            return
+
+        error = interval - session.interval
+        session.interval += self.gain * error
+        session.jitter   += self.deviation_gain * (abs(error) - session.jitter)
+        timeout = session.interval + max(self.deviations * session.jitter, self.margin * session.interval)
+        session.release_timeout = min(max(timeout, self.minimum), self.maximum)
+
+    def repeat_due(self, session, repeat, time):
+        """
+        Returns whether an action repeated every `repeat` seconds while held, last run at the session's
+        `last_action_time`, runs again for a packet received at `time` (ns). The packet closest to the repeat
+        time runs it rather than the first one after it, so the actual period stays close to `repeat`.
+        """
+        return time - session.last_action_time >= (repeat - session.interval / 2) * 1e9
@@ -0,0 +1,92 @@
+import protocol
+
+# A timestep going back further than this (sec) is a change of the phone's clock rather than a late packet
+RESYNC = 5
+
+class PacketSequencer:
+    """
+    Orders the layout packets of one client by their Timestep, the phone's time of day, so the gesture stage sees
+    a monotonic stream of distinct samples whatever UDP did on the way.
+
+    A packet older than the latest accepted one arrived out of order and is dropped, as is an exact copy of the
+    latest one. Gaps in the timesteps give an estimate of the packets lost, when the timesteps are fine enough to
+    show them (the text packets only carry whole seconds). The transit time of every packet, the difference
+    between its reception and its timestep, gives the offset between both clocks (its minimum, made of the clock
+    offset and the shortest network delay) and the interarrival jitter as in RFC 3550.
+    """
+
+    __slots__ = ('last_timestep', 'last_data', 'fine', 'offset', 'transit', 'jitter',
+                 'accepted', 'duplicates', 'reordered', 'lost')
+
+    def __init__(self):
+        self.last_timestep = None  # Timestep (sec since midnight) of the latest accepted packet
+        self.last_data     = None
+        self.fine          = False # Whether the client sends sub-second timesteps
+        self.offset        = None  # Smallest transit time seen (sec)
+        self.transit       = None  # Transit time of the latest accepted packet (sec)
+        self.jitter        = 0.0   # Interarrival jitter (sec)
+
+        self.accepted   = 0
+        self.duplicates = 0
+        self.reordered  = 0
+        self.lost       = 0
+
+    def accept(self, data, received, interval=None):
+        """
+        Returns whether a layout packet is new and in order, updating the counters and clock estimates.
+
+        Parameters:
+        -----------
+            data (`dict`): Decoded layout packet, its Timestep is the client's time of day as HHmmss.
+            received (`float`): Server's time of day (sec since midnight) at reception.
+            interval (`float`): Expected interval (sec) between consecutive packets, to count the packets lost in a
+                                gap, None when the packet starts a gesture (the client does not send in between).
+
+        Returns:
+        --------
+            accepted (`bool`): False for a duplicate or a packet older than the latest accepted one.
+        """
+        sent = protocol.timestep_seconds(data['Timestep'])
+        if not self.fine and sent != int(sent):
+            self.fine = True
+
+        if self.last_timestep is not None:
+            # Difference wrapped at midnight, so the time of day can roll over
+            delta = (sent - self.last_timestep + 43200) % 86400 - 43200
+            if -RESYNC < delta < 0:
+                # The packet was counted as lost in the gap it left
+                self.reordered += 1
+                if self.lost:
+                    self.lost -= 1
+                return False
+            if delta <= -RESYNC:
+                self.offset = self.transit = None
+            if delta == 0 and data == self.last_data:
+                self.duplicates += 1
+                return False
+            if self.fine and interval and 1.5 * interval < delta < RESYNC:
+                self.lost += round(delta / interval) - 1
+
+        transit = (received - sent + 43200) % 86400 - 43200
+        if self.offset is None or transit < self.offset:
+            self.offset = transit
+        if self.transit is not None:
+            self.jitter += (abs(transit - self.transit) - self.jitter) / 16
+        self.transit = transit
+
+        self.last_timestep = sent
+        self.last_data     = data
+        self.accepted     += 1
+        return True
+
+    def stats(self):
+        """
+        Returns the counters and clock estimates (sec) as a dictionary.
+        """
+        return {'accepted'     : self.accepted,
+                'duplicates'   : self.duplicates,
+                'reordered'    : self.reordered,
+                'lost'         : self.lost,
+                'loss_rate'    : self.lost / (self.lost + self.accepted) if self.accepted else 0.0,
+                'clock_offset' : self.offset,
+                'jitter'       : self.jitter}
@@ -1,60 +1,43 @@
-import os
 import tkinter as tk
-from tkinter import ttk
-import socket, traceback
+from tkinter import ttk, messagebox
 import threading
-import json
+import socket
 
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
-
-import keyboard
 import random
 import time
-import csv
 
-class Server:
+import core
+import experiment_store
+import bridge
+
+class Server(core.ControlServer):
     """
     Main server class. It initializes the variables needed to display the graphical user interface
-    and opens a UDP socket which listens to a user-defined port.
+    and opens a UDP socket which listens to a user-defined port. Packet handling is done by
+    `core.ControlServer`, whose hooks are overridden here to update the widgets.
     """
 
-    def __init__(self, host, port):
-        self.host = host
-        self.port = port
-
-        self.settings = {}
-        self.populate_settings()
-
-        self.ACTIONS = {"Not Used"    : {"function": self.not_used,      "has_params": False},
-                        "Play/Pause"  : {"function": self.play_pause,    "has_params": False},
-                        "Previous"    : {"function": self.previous,      "has_params": False},
-                        "Next"        : {"function": self.next,          "has_params": False},
-                        "Stop"        : {"function": self.stop,          "has_params": False},
-                        "Volume+"     : {"function": self.increase_vol,  "has_params": True},
-                        "Volume-"     : {"function": self.decrease_vol,  "has_params": True},
-                        "Seek+"       : {"function": self.increase_seek, "has_params": True},
-                        "Seek-"       : {"function": self.decrease_seek, "has_params": True},
-                        "Scroll UP"   : {"function": self.scroll_up,     "has_params": True},
-                        "Scroll DOWN" : {"function": self.scroll_down,   "has_params": True},
-                        "Mute"        : {"function": self.mute,          "has_params": False},
-                        "OK"          : {"function": self.ok,            "has_params": False},
-                        "ESC"         : {"function": self.esc,           "has_params": False}}
-
-        self.TYPES = ["Constant",
-                      "Incremental",
-                      "Steps"]
-
-        self.active_status         = False
+    def __init__(self, host, port, refresh_rate=20, **options):
+        super().__init__(host, port, **options)
+
         self.test_status           = False
         self.experiment_info_shown = False
-        self.device_tabs           = ('layout', 'remote')
 
-        # Get default audio device using PyCAW
-        self.devices   = AudioUtilities.GetSpeakers()
-        self.interface = self.devices.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-        self.volume    = cast(self.interface, POINTER(IAudioEndpointVolume))
+        # The running test's (required action, tab). Packets are matched against it as they are handled,
+        # and the first match sets the event with the monotonic time (ns) and latencies of the matching packet.
+        # The lock keeps a late packet from overwriting them once the runner has cleared the target
+        self.experiment_target     = None
+        self.experiment_lock       = threading.Lock()
+        self.experiment_match      = threading.Event()
+        self.experiment_match_time = 0
+        self.experiment_latencies  = (None, None)
+
+        # Slider tests are matched on these values rather than on the widgets, which belong to the main loop: the
+        # slider the packets move (Volume or Seek, None when no slider is tested), the value of each user slider
+        # and the required value. The runner sets them and the matched packets post the slider redraws
+        self.experiment_slider   = None
+        self.experiment_values   = {'Volume': 0, 'Seek': 0}
+        self.experiment_required = 0
 
         # Window and canvas initialization parameters
         self.width  = 700
@@ -63,42 +46,21 @@ class Server:
         self.window.title("Android's Sensors")
         self.window.resizable(False, False)
 
+        # Widgets are only updated from the main loop, the ingestion threads post their changes here
+        self.ui = bridge.GuiBridge()
+        self.ui.attach(self.window)
+
         self.create_tabs_frame()
-        self.create_udp_stream()
 
-    def populate_settings(self):
-        """
-        This function populates the application's setting on startup. If there is not a settings.json file present, 
-        create one with default parameters.
-        """
-        try:
-            with open('./server/settings.json') as json_file:
-                self.settings = json.load(json_file)
-        except:
-            print('No settings file found. Created file with default settings.')
-            self.settings['LSTU'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['LSTD'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['LSTL'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['LSTR'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['RSTU'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['RSTD'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['RSTL'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['RSTR'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['TSTU'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['TSTD'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['TSTL'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['TSTR'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['BSTU'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['BSTD'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['BSTL'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-            self.settings['BSTR'] = {'Interaction' : 'Not Used', 'Type' : 'Not Used'}
-
-    def save_settings(self):
-        """
-        Save settings from the application to a json file.
-        """
-        with open('./server/settings.json', 'w') as json_settings:
-            json.dump(self.settings, json_settings)
+        # Per-packet state (sensor values, status, counters) is published into slots and shown `refresh_rate` times per second
+        self.view = bridge.PollingView(rate=refresh_rate)
+        self.view.add('status',   lambda status: [(self.status_var, status)])
+        self.view.add('action',   lambda action: [(self.current_action_var, action)])
+        self.view.add('sample',   self.render_sensor_data)
+        self.view.add('counters', self.render_counters)
+        self.view.attach(self.window)
+
+        self.start()
 
     def create_tabs_frame(self):
         self.tab_widget = ttk.Notebook(self.window, width=self.width, height=self.height)
@@ -127,9 +89,14 @@ class Server:
         self.interaction_frame.rowconfigure(2, minsize=100, weight=1)
         self.create_interaction_frame(self.interaction_frame)
 
+        self.metrics_frame = tk.Frame(self.tab_widget)
+        self.metrics_frame.columnconfigure(0, weight=1)
+        self.create_metrics(self.metrics_frame)
+
         self.tab_widget.add(self.general_frame, text='General')
         self.tab_widget.add(self.settings_frame, text='Settings')
         self.tab_widget.add(self.interaction_frame, text='Interaction Testing')         
+        self.tab_widget.add(self.metrics_frame, text='Metrics')
 
         def experiments_popup():
             popup_window = tk.Toplevel()
@@ -218,6 +185,20 @@ class Server:
         self.label_client_var = tk.Label(conn_info_frame, textvariable=self.client_var, fg="Red")
         self.label_client_var.grid(row=3, column=1, sticky="w", padx=25)
 
+        packets_label = tk.Label(conn_info_frame, text="Packets:")
+        packets_label.grid(row=4, column=0, sticky="we")
+        self.packets_var = tk.StringVar()
+        self.packets_var.set("0 received | 0 dropped")
+        label_packets_var = tk.Label(conn_info_frame, textvariable=self.packets_var)
+        label_packets_var.grid(row=4, column=1, sticky="w", padx=25)
+
+        actions_label = tk.Label(conn_info_frame, text="Actions:")
+        actions_label.grid(row=5, column=0, sticky="we")
+        self.actions_var = tk.StringVar()
+        self.actions_var.set("Queue: 0 | Latency: 0 ms")
+        label_actions_var = tk.Label(conn_info_frame, textvariable=self.actions_var)
+        label_actions_var.grid(row=5, column=1, sticky="w", padx=25)
+
         active_info_frame = tk.Frame(status_frame)
         active_info_frame.grid(row=0, column=1, sticky="we", padx=0)
 
@@ -325,6 +306,36 @@ class Server:
 
     def create_settings(self, parent):
 
+        def create_gesture_setting(group, key, text, row):
+            gesture_label = tk.Label(group, anchor="w", text=text)
+            gesture_label.grid(row=row, column=0, sticky="we")
+
+            action_var = tk.StringVar(group)
+            action_var.set(self.settings[key]['Interaction'])
+
+            self.settings_widgets[key] = {'action': ttk.OptionMenu(group, action_var, action_var.get(), *list(self.ACTIONS),
+                                                                   command=lambda x: modify_setting(action_var, key, 'Interaction'))}
+            self.settings_widgets[key]['action'].grid(row=row, column=1, sticky="we")
+
+            type_var = tk.StringVar(group)
+            type_var.set(self.settings[key]['Type'])
+
+            self.settings_widgets[key]['type'] = ttk.OptionMenu(group, type_var, type_var.get(), *self.TYPES,
+                                                                command=lambda x: modify_setting(type_var, key, 'Type'))
+            self.settings_widgets[key]['type'].grid(row=row, column=2, sticky="we")
+            if self.ACTIONS[self.settings[key]['Interaction']]['has_params'] is False: self.settings_widgets[key]['type'].configure(state="disabled")
+
+        def create_sensor_setting(group, region):
+            sensor_label = tk.Label(group, anchor="w", text="Sensor:")
+            sensor_label.grid(row=6, column=0, sticky="we")
+
+            sensor_var = tk.StringVar(group)
+            sensor_var.set(self.settings.get(region, {}).get('Sensor', "Accelerometer"))
+
+            self.settings_widgets[region] = {'sensor': ttk.OptionMenu(group, sensor_var, sensor_var.get(), *self.SENSOR_SOURCES,
+                                                                      command=lambda x: modify_sensor(sensor_var, region))}
+            self.settings_widgets[region]['sensor'].grid(row=6, column=1, sticky="we")
+
         def create_layout_settings(parent_frame):
             self.settings_widgets = {}
 
@@ -414,6 +425,9 @@ class Server:
                                                                     command=lambda x: modify_setting(self.lstr_type_vars, 'LSTR', 'Type'))}
             self.settings_widgets['LSTR']['type'].grid(row=3, column=2, sticky="we")
             if self.ACTIONS[self.settings['LSTR']['Interaction']]['has_params'] is False: self.settings_widgets['LSTR']['type'].configure(state="disabled")
+            create_gesture_setting(ls_group, 'LSWL', "Twist Left:", 4)
+            create_gesture_setting(ls_group, 'LSWR', "Twist Right:", 5)
+            create_sensor_setting(ls_group, 'LS')
 
             tk.Frame(parent_frame, height=1, bg="black").grid(row=0, column=1, sticky="news")
 
@@ -503,6 +517,9 @@ class Server:
                                                                     command=lambda x: modify_setting(self.rstr_type_vars, 'RSTR', 'Type'))
             self.settings_widgets['RSTR']['type'].grid(row=3, column=2, sticky="we")
             if self.ACTIONS[self.settings['RSTR']['Interaction']]['has_params'] is False: self.settings_widgets['RSTR']['type'].configure(state="disabled")
+            create_gesture_setting(rs_group, 'RSWL', "Twist Left:", 4)
+            create_gesture_setting(rs_group, 'RSWR', "Twist Right:", 5)
+            create_sensor_setting(rs_group, 'RS')
 
             tk.Frame(parent_frame, height=1, bg="black").grid(row=1, column=0, sticky="news", columnspan=3)
             #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Screen Top Actions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
@@ -591,6 +608,9 @@ class Server:
                                                                     command=lambda x: modify_setting(self.tstr_type_vars, 'TSTR', 'Type'))
             self.settings_widgets['TSTR']['type'].grid(row=3, column=2, sticky="we")
             if self.ACTIONS[self.settings['TSTR']['Interaction']]['has_params'] is False: self.settings_widgets['TSTR']['type'].configure(state="disabled")
+            create_gesture_setting(ts_group, 'TSWL', "Twist Left:", 4)
+            create_gesture_setting(ts_group, 'TSWR', "Twist Right:", 5)
+            create_sensor_setting(ts_group, 'TS')
 
             tk.Frame(parent_frame, height=1, width=1, bg="black").grid(row=2, column=1, sticky="news")
 
@@ -680,16 +700,24 @@ class Server:
                                                     command=lambda x: modify_setting(self.bstr_type_vars, 'BSTR', 'Type'))
             self.settings_widgets['BSTR']['type'].grid(row=3, column=2, sticky="we")
             if self.ACTIONS[self.settings['BSTR']['Interaction']]['has_params'] is False: self.settings_widgets['BSTR']['type'].configure(state="disabled")
+            create_gesture_setting(bs_group, 'BSWL', "Twist Left:", 4)
+            create_gesture_setting(bs_group, 'BSWR', "Twist Right:", 5)
+            create_sensor_setting(bs_group, 'BS')
 
             tk.Frame(parent_frame, height=1, bg="black").grid(row=3, column=0, sticky="news", columnspan=3)
 
         def modify_setting(*args):
             self.settings[args[1]][args[2]] = args[0].get()
+            self.compile_dispatch()
             if self.ACTIONS[self.settings[args[1]]['Interaction']]['has_params'] is False:
                 self.settings_widgets[args[1]]['type'].configure(state="disabled")
             else:
                 self.settings_widgets[args[1]]['type'].configure(state="enabled")
 
+        def modify_sensor(sensor_var, region):
+            self.settings.setdefault(region, {})['Sensor'] = sensor_var.get()
+            self.compile_dispatch()
+
         # Settings for Screen layout mode
         self.screen_layout = tk.Frame(parent)
         self.screen_layout.grid(row=0, column=0, sticky="nswe")
@@ -881,6 +909,43 @@ class Server:
         self.interaction_widgets['Seek'].grid(row=3, column=0, sticky="news")
         self.interaction_widgets['Seek']["state"] = "disabled"
 
+    def create_metrics(self, parent):
+        metrics_title = tk.Label(parent, text="Pipeline Stages", font=("Courier", 24), anchor="w",)
+        metrics_title.grid(row=0, column=0, sticky="we")
+
+        if self.metrics is None:
+            metrics_disabled = tk.Label(parent, text="Metrics are disabled. Start the server with --metrics to record them.", anchor="w")
+            metrics_disabled.grid(row=1, column=0, sticky="we", padx=25)
+            return
+
+        stages_frame = tk.Frame(parent)
+        stages_frame.grid(row=1, column=0, sticky="we", padx=25)
+        for column, heading in enumerate(["Stage", "Count", "p50 (µs)", "p99 (µs)", "Max (µs)"]):
+            stages_frame.columnconfigure(column, weight=1)
+            heading_label = tk.Label(stages_frame, text=heading, font='Helvetica 10 bold', anchor="w")
+            heading_label.grid(row=0, column=column, sticky="we")
+
+        # One row of StringVars per stage: count, p50, p99 and max
+        self.metrics_vars = {}
+        for row, stage in enumerate(self.metrics.histograms, start=1):
+            stage_label = tk.Label(stages_frame, text=stage, anchor="w")
+            stage_label.grid(row=row, column=0, sticky="we")
+            self.metrics_vars[stage] = [tk.StringVar(value="0") for _ in range(4)]
+            for column, variable in enumerate(self.metrics_vars[stage], start=1):
+                value_label = tk.Label(stages_frame, textvariable=variable, anchor="w")
+                value_label.grid(row=row, column=column, sticky="we")
+
+        self.window.after(1000, self.refresh_metrics)
+
+    def refresh_metrics(self):
+        for stage, histogram in self.metrics.histograms.items():
+            values = (str(histogram.count), str(round(histogram.quantile(0.5) / 1000, 1)),
+                      str(round(histogram.quantile(0.99) / 1000, 1)), str(round(histogram.max / 1000, 1)))
+            for variable, text in zip(self.metrics_vars[stage], values):
+                if variable.get() != text:
+                    variable.set(text)
+        self.window.after(1000, self.refresh_metrics)
+
     def start_experiment(self):
         """
         Starts an experiment cycle consisting of two separate test cases:
@@ -889,114 +954,95 @@ class Server:
 
         Each experiment requires 10 different random actions to be matched within some time limit.
         """
+        # Runs on its own thread, every widget change is posted to the main loop
         # Reset information between each tested tab
         def reset_info():
-                self.experiments_progress_bar['value'] = 0
+                self.ui.post(self.experiments_progress_bar.config, {'value': 0})
                 self.mistakes = self.correct_answers = 0
-                self.current_test_var.set("Correct: " + str(self.correct_answers) + " | Mistakes: " + str(self.mistakes))
+                self.ui.post(self.current_test_var.set, "Correct: " + str(self.correct_answers) + " | Mistakes: " + str(self.mistakes))
 
         def next_experiment(duration):
             for i in range(duration, 0, -1):
-                self.current_experiment_type.set("The next experiment will start in " + str(i) + " seconds.")
+                self.ui.post(self.current_experiment_type.set, "The next experiment will start in " + str(i) + " seconds.")
                 time.sleep(1)
 
         self.test_status = True
         self.mistakes = self.correct_answers = 0
         experiment_results = []
-        self.experiments_progress_bar['value'] = 0
+        experiment_session = time.strftime("%Y%m%d%H%M%S")
+        self.ui.post(self.experiments_progress_bar.config, {'value': 0})
         modes = ['speed', 'interactive']
         test_number = 1
         timeout = 5
 
         # Disable experimental controls to prevent unwanted behavior
-        self.interaction_start["state"] = "disabled"
-        self.current_test_var.set("Correct: 0 | Mistakes: 0")
+        self.ui.post(self.interaction_start.config, {'state': 'disabled'})
+        self.ui.post(self.current_test_var.set, "Correct: 0 | Mistakes: 0")
 
         next_experiment(timeout)
 
         for mode in modes:
             for tab in self.device_tabs:
                 if mode == "speed":
-                    self.current_experiment_type.set("The current experiment is measuring speed. (" + str(test_number) + "/4)")
-                    self.current_experiment_device.set("Please hold the device between individual tests.")
+                    self.ui.post(self.current_experiment_type.set, "The current experiment is measuring speed. (" + str(test_number) + "/4)")
+                    self.ui.post(self.current_experiment_device.set, "Please hold the device between individual tests.")
                 else:
-                    self.current_experiment_type.set("The current experiment is interactive. (" + str(test_number) + "/4)")
-                    self.current_experiment_device.set("Please let down the device between individual tests.")
+                    self.ui.post(self.current_experiment_type.set, "The current experiment is interactive. (" + str(test_number) + "/4)")
+                    self.ui.post(self.current_experiment_device.set, "Please let down the device between individual tests.")
                 if tab == "layout":
-                    self.current_experiment_tab.set("Please make use of the LAYOUT control tab.")
+                    self.ui.post(self.current_experiment_tab.set, "Please make use of the LAYOUT control tab.")
                 else:
-                    self.current_experiment_tab.set("Please make use of the REMOTE control tab.")
+                    self.ui.post(self.current_experiment_tab.set, "Please make use of the REMOTE control tab.")
 
                 # Run 10 random tests for each mode and tab
                 for i in range(0, 10):
-                    self.progress_value.set("Test number: " + str(i+1) + "/10")
+                    self.ui.post(self.progress_value.set, "Test number: " + str(i+1) + "/10")
                     test_interaction, widget = random.choice(list(self.interaction_widgets.items()))
-                    widget["state"] = "enabled"
+                    self.ui.post(widget.config, {'state': 'enabled'})
+                    user_slider = None
                     if test_interaction == "Volume" or test_interaction == "Seek":
-                        if test_interaction == "Volume":
-                            self.experiment_volume_user["state"] = "enabled"
-                        else:
-                            self.experiment_seek_user["state"] = "enabled"
-                        widget.set(random.randint(0, 100))
-
-                    timout_start = time.time()
-                    found        = False
-
-                    # Allow 3 seconds for each required action to be matched (Very CPU consuming loop!)
-                    while time.time() < timout_start + timeout:
-                        if self.active_interaction == '':
-                            continue
-                        if self.control_type == tab:
-                            if test_interaction == "Volume":
-                                volume_user = self.experiment_volume_user.get()
-                                volume_required = self.interaction_widgets['Volume'].get()
-                                if volume_user >= volume_required - 10 and volume_user <= volume_required + 10:
-                                    found = True
-                                    break
-                            if test_interaction == "Seek":
-                                seek_user = self.experiment_seek_user.get()
-                                seek_required = self.interaction_widgets['Seek'].get()
-                                if seek_user >= seek_required - 10 and seek_user <= seek_required + 10:
-                                    found = True
-                                    break
-                            if tab == 'remote':
-                                if self.active_interaction == test_interaction:
-                                    found = True
-                                    break
-                            else:
-                                # TODO The following should be checked as we shouldn't check for empty key again.
-                                # I think it is a threading problem where the active interaction it gets reset during this loop.
-                                if self.active_interaction and self.settings[self.active_interaction]['Interaction'] == test_interaction:
-                                    found = True
-                                    break
-                        time.sleep(0.2)
-
-                    timeout_end = time.time()
+                        user_slider = self.experiment_volume_user if test_interaction == "Volume" else self.experiment_seek_user
+                        self.ui.post(user_slider.config, {'state': 'enabled'})
+                        self.experiment_required = random.randint(0, 100)
+                        self.experiment_slider   = test_interaction
+                        self.ui.post(widget.set, self.experiment_required)
+
+                    # Wait up to `timeout` seconds for a packet matching the required action, it is checked by on_action
+                    self.experiment_match.clear()
+                    timout_start = time.monotonic_ns()
+                    self.experiment_target = (test_interaction, tab)
+                    self.experiment_match.wait(timeout)
+                    with self.experiment_lock:
+                        self.experiment_target = None
+                        found = self.experiment_match.is_set()
+
+                    timeout_end = self.experiment_match_time if found else time.monotonic_ns()
+                    network_latency, dispatch_latency = self.experiment_latencies if found else (None, None)
 
                     # Disable the controls for the required test
-                    widget["state"] = "disabled"
-                    if self.experiment_volume_user["state"] == "enabled": self.experiment_volume_user["state"] = "disabled"
-                    if self.experiment_seek_user["state"]   == "enabled": self.experiment_seek_user["state"]   = "disabled"
+                    self.experiment_slider = None
+                    self.ui.post(widget.config, {'state': 'disabled'})
+                    if user_slider is not None: self.ui.post(user_slider.config, {'state': 'disabled'})
 
                     if found: self.correct_answers += 1
                     else:     self.mistakes += 1
 
                     # Update correct answers and mistakes interactivelly
-                    self.current_test_var.set("Correct: " + str(self.correct_answers) + " | Mistakes: " + str(self.mistakes))
-                    self.experiments_progress_bar['value'] += 10
+                    self.ui.post(self.current_test_var.set, "Correct: " + str(self.correct_answers) + " | Mistakes: " + str(self.mistakes))
+                    self.ui.post(self.experiments_progress_bar.step, 10)
                     
-                    if timeout_end < timout_start + timeout:
-                        time.sleep(timout_start + timeout - timeout_end)
+                    if timeout_end < timout_start + timeout * core.NS:
+                        time.sleep((timout_start + timeout * core.NS - timeout_end) / core.NS)
 
-                    result = timeout_end-timout_start
-                    experiment_results.append((test_interaction, round(result,3), found, mode, tab))
+                    result = (timeout_end-timout_start) / core.NS
+                    experiment_results.append((test_interaction, round(result,3), network_latency, dispatch_latency, found, mode, tab))
 
                     # Check if mode is interactive thus allowing time for the device to be put down
                     if mode == "interactive":
                         time.sleep(3)
                 
                 if tab == "layout":
-                    self.current_experiment_tab.set("Please switch to the REMOTE control tab.")
+                    self.ui.post(self.current_experiment_tab.set, "Please switch to the REMOTE control tab.")
                     next_experiment(timeout)
 
                 reset_info()
@@ -1008,305 +1054,102 @@ class Server:
         
         # Reset experimental status after experiments are complete
         self.test_status = False
-        self.interaction_start["state"] = "enabled"
-        self.current_experiment_type.set("All the experiments are now complete.")
-        self.current_experiment_device.set("The experiments start measuring the Speed.")
-        self.current_experiment_tab.set("Please make use of the layout control tab.")
-
-        # Write experiments to a csv file for visualization
-        if not os.path.exists("./reports/experiments"):
-            os.makedirs("./reports/experiments")
-        filename = 'reports/experiments/' + time.strftime("%Y%m%d%H%M%S") + '_experiment.csv'
-        with open(filename,'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['Required Action', 'Time', 'Correct', 'Mode', 'Tab'])
-            writer.writerows(experiment_results)
-
-    def action_controller(self):
-        while True:
-            if self.connected:
-                if time.time()-self.received_time_history >= 0.23:
-                    self.active_interaction = ''
-                    self.action_compensation = False
-                    self.current_action_var.set('None')
-                    self.control_type = None
-
-                if time.time()-self.received_time_history >= 1:
-                    self.status_var.set("Waiting for Data")
-                
-                if time.time()-self.received_time_history >= 60:
-                    self.connected = False
-                    self.label_status_var.config(fg='red')
-                    self.label_client_var.config(fg='red')
-                    self.status_var.set("Not connected")
-                    self.client_var.set("Not connected")
-            time.sleep(0.1)
-
-    def get_data(self):
-        """
-        Read and deserialize the UDP data stream from the connected device's sensors.
-
-        Parameters:
-        -----------
-            data (`str`): Data read from UDP stream.
-
-        Returns:
-        --------
-            None
-        """
-        def decode_parameter(input):
-            if input == 'not_ready':
-                return input
-            else:
-                return float(input)
-
-        self.connected = False
-        self.received_time_history = 0
-
-        self.active_interaction = ''
-        self.action_compensation = False
-        self.control_type = None
-        self.last_action_time = 0
-
-        self.sensor_history = (0, 0, 0) # Past values used for comparisons
-
-        self.action_controller_thread = threading.Thread(target=self.action_controller, daemon=True)
-        self.action_controller_thread.start()
-
-        while True:
-            try:
-                # Buffer size 1024
-                message, address = self.s.recvfrom(1024)
-                message_string = message.decode("utf-8")
-
-                if message_string:
-                    received_time = time.time()
-                    self.status_var.set("Receiving Data")
-
-                    if not self.connected:
-                        self.label_status_var.config(fg='green')
-                        self.label_client_var.config(fg='black')
-                        self.status_var.set("Receiving Data")
-                        self.client_var.set(address[0])
-                        self.connected = True
-
-                    message_string = message_string.replace(' ','').split(",")
-
-                    if len(message_string) == 12:
-                        self.control_type = self.device_tabs[0]
-                        data = {}
-                        data['Timestep']      = float(message_string[0])
-                        data['Action']        = message_string[1]
-                        data['Gyroscope']     = {'x': decode_parameter(message_string[2]), 'y': decode_parameter(message_string[3]), 'z':  decode_parameter(message_string[4])}
-                        data['Accelerometer'] = {'x': decode_parameter(message_string[5]), 'y': decode_parameter(message_string[6]), 'z':  decode_parameter(message_string[7])}
-                        data['Rotation']      = {'x': decode_parameter(message_string[8]), 'y': decode_parameter(message_string[9]), 'z':  decode_parameter(message_string[10])}
-                        self.update_sensor_data(data)
-                        if data['Accelerometer']['x'] != 'not_ready':
-                            self.execute_command(data, mode="layout", sensor="Accelerometer")
-                        else:
-                            tk.messagebox.showwarning(title='Sensor Warning', message='Accelerometer is not supported in this device')
-                    elif len(message_string) == 1:
-                        self.control_type = self.device_tabs[1]
-                        self.execute_command(message_string, mode="remote")
-                    else:
-                        continue
-
-                    self.received_time_history = received_time
-   
-            except (KeyboardInterrupt, SystemExit):
-                raise traceback.print_exc()
-
-    def update_sensor_data(self, data):
-        if not self.active_status and not self.test_status:
-            self.gyro_x.set(str(data['Gyroscope']['x']))
-            self.gyro_y.set(str(data['Gyroscope']['y']))
-            self.gyro_z.set(str(data['Gyroscope']['z']))
+        self.ui.post(self.interaction_start.config, {'state': 'enabled'})
+        self.ui.post(self.current_experiment_type.set, "All the experiments are now complete.")
+        self.ui.post(self.current_experiment_device.set, "The experiments start measuring the Speed.")
+        self.ui.post(self.current_experiment_tab.set, "Please make use of the layout control tab.")
 
-            self.acceleration_x.set(str(data['Accelerometer']['x']))
-            self.acceleration_y.set(str(data['Accelerometer']['y']))
-            self.acceleration_z.set(str(data['Accelerometer']['z']))
+        # Append the results to the experiment store for visualization
+        experiment_store.ExperimentStore().append(experiment_session, experiment_results)
 
-            self.rotation_x.set(str(data['Rotation']['x']))
-            self.rotation_y.set(str(data['Rotation']['y']))
-            self.rotation_z.set(str(data['Rotation']['z']))
+    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Front End Hooks ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
+    def on_connect(self, session):
+        self.ui.post(self.label_status_var.config, {'fg': 'green'})
+        self.ui.post(self.label_client_var.config, {'fg': 'black'})
+        self.ui.post(self.client_var.set, self.describe_clients())
 
-    def execute_command(self, data, mode, sensor="Accelerometer"):
-        """
-        Executes an action based on sensor data. This function is also responsible for executing\n
-        actions depending on active and test statuses.
+    def on_disconnect(self, session):
+        self.ui.post(self.client_var.set, self.describe_clients())
+        if not self.sessions:
+            self.ui.post(self.label_status_var.config, {'fg': 'red'})
+            self.ui.post(self.label_client_var.config, {'fg': 'red'})
+            self.view.publish('status', "Not connected")
 
-        Parameters:
-        -----------
-            data (`dict`): Dictionary containing data from the client's sensors.
+    def on_waiting(self, session):
+        self.view.publish('status', "Waiting for Data")
 
-        Returns:
-        --------
-            None
-        """
+    def on_release(self, session):
+        self.view.publish('action', 'None')
 
-        # Time between dataframes ~ 0.21 sec which means that when this thrueshold is passed a new action should be activated
-        if self.active_interaction == '':
-            if mode=="layout":
-                if not self.action_compensation:
-                    self.sensor_history = (data[sensor]['x'],  data[sensor]['y'],  data[sensor]['z'])
-                    self.action_compensation = True
-                    return False
-                else:
-                    self.active_interaction = data['Action'] + self.get_tilt_kind(data[sensor])
-                    self.current_action_var.set(self.active_interaction + " - (" + self.settings[self.active_interaction]['Interaction'] + ")")
-                    self.sensor_history = ( data[sensor]['x'],  data[sensor]['y'],  data[sensor]['z'])
-            else:
-                self.active_interaction = data[0]
-                if self.active_interaction == 'Play' or self.active_interaction == 'Pause':
-                    self.active_interaction = 'Play/Pause'
-                if self.active_interaction == 'Unmute':
-                    self.active_interaction = 'Mute'
-                self.current_action_var.set(data[0])
-
-        # When active_status is active the application is controlling this device's resources
-        if self.active_status and self.active_interaction:
-            if mode=="layout":
-                if (time.time() - self.last_action_time > 0.5 or
-                    self.settings[self.active_interaction]['Interaction'] in ("Volume+", "Volume-", "Seek+", "Seek-", "Scroll UP", "Scroll DOWN")):
-                    if self.ACTIONS[self.settings[self.active_interaction]['Interaction']]['has_params']:
-                        self.ACTIONS[self.settings[self.active_interaction]['Interaction']]['function'](self.settings[self.active_interaction]['Type'])
-                    else:
-                        self.ACTIONS[self.settings[self.active_interaction]['Interaction']]['function']()
-                    self.last_action_time = time.time()
-            else:
-                if self.ACTIONS[self.active_interaction]['has_params']:
-                    self.ACTIONS[self.active_interaction]['function']('Not Used')
-                else:
-                    self.ACTIONS[self.active_interaction]['function']()         
+    def on_interaction(self, session, description):
+        self.view.publish('action', description)
 
+    def on_action(self, session, interaction):
         # When test_status is active, an experiment is underway
         if self.test_status:
-            if mode=="layout":
-                if self.experiment_volume_user["state"] == "enabled" and self.active_interaction != '':
-                    if (self.settings[self.active_interaction]['Interaction']) == "Volume-":
-                        self.experiment_volume_user.set(self.experiment_volume_user.get()-10)
-                    elif (self.settings[self.active_interaction]['Interaction']) == "Volume+":
-                        self.experiment_volume_user.set(self.experiment_volume_user.get()+10)
-                elif self.experiment_seek_user["state"] == "enabled" and self.active_interaction != '':
-                    if (self.settings[self.active_interaction]['Interaction']) == "Seek-":
-                        self.experiment_seek_user.set(self.experiment_seek_user.get()-10)
-                    elif (self.settings[self.active_interaction]['Interaction']) == "Seek+":
-                        self.experiment_seek_user.set(self.experiment_seek_user.get()+10)
-            else:
-                if self.experiment_volume_user["state"] == "enabled" and self.active_interaction != '':
-                    if (self.active_interaction) == "Volume-":
-                        self.experiment_volume_user.set(self.experiment_volume_user.get()-10)
-                    elif (self.active_interaction) == "Volume+":
-                        self.experiment_volume_user.set(self.experiment_volume_user.get()+10)
-                elif self.experiment_seek_user["state"] == "enabled" and self.active_interaction != '':
-                    if (self.active_interaction) == "Seek-":
-                        self.experiment_seek_user.set(self.experiment_seek_user.get()-10)
-                    elif (self.active_interaction) == "Seek+":
-                        self.experiment_seek_user.set(self.experiment_seek_user.get()+10)
-
-
-    def get_tilt_kind(self, sensor_data):
-        """
-        Returns the current phone's tilt gesture.
-
-        Parameters:
-        -----------
-            rot_vector (`dict`): Data from client's rotation vector in x,y,z
-
-        Returns:
-        --------
-            tilt (string): String representation of tilt. Possible values are:
-            * TU: Tilt Up
-            * TD: Tilt Down
-            * TR: Tilt Right
-            * TL: Tilt Left
-        """
-
-        if abs(sensor_data['x']-self.sensor_history[0]) > abs(sensor_data['y']-self.sensor_history[1]):
-            if sensor_data['x']-self.sensor_history[0] > 0: return "TL"
-            else:                                           return "TR"
-        else:
-            if sensor_data['y']-self.sensor_history[1] > 0: return "TU"
-            else:                                           return "TD"
-
-    #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Action Functions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~#
-    def not_used(self):
-        pass
-
-    def play_pause(self):
-        keyboard.send("space", do_press=True, do_release=True)
-
-    def previous(self):
-        keyboard.send("left", do_press=True, do_release=True)
-
-    def next(self):
-        keyboard.send("right", do_press=True, do_release=True)
-
-    def stop(self):
-        pass
-
-    def increase_vol(self, mode):
+            # Runs on the ingestion thread, the slider is only redrawn by the main loop
+            slider = self.experiment_slider
+            if slider is not None and (interaction == slider + "-" or interaction == slider + "+"):
+                value = self.experiment_values[slider] + (10 if interaction == slider + "+" else -10)
+                self.experiment_values[slider] = value = min(max(value, 0), 100)
+                self.ui.post(self.experiment_volume_user.set if slider == "Volume" else self.experiment_seek_user.set, value)
+
+            # Only the first match of a test is kept, and none once the runner has cleared the target
+            with self.experiment_lock:
+                target = self.experiment_target
+                if target is not None and not self.experiment_match.is_set() and self.experiment_matched(session, interaction, *target):
+                    self.experiment_match_time = time.monotonic_ns()
+                    network_latency            = self.network_latency(session) if session.control_type == self.device_tabs[0] else None
+                    self.experiment_latencies  = (None if network_latency is None else round(network_latency, 3),
+                                                  round((self.experiment_match_time - session.received_time_history) / core.NS, 6))
+                    self.experiment_match.set()
+
+    def experiment_matched(self, session, interaction, test_interaction, tab):
         """
-        Increase system's volume by specific ammount.
+        Returns whether the interaction of a packet completes the running test: the required action on the
+        required tab, or the user's volume or seek slider within 10 of the required value.
         """
-        # Get current volume
-        # set_volume = min(1.0, max(0.0, mode))
-        currentVolumeDb = self.volume.GetMasterVolumeLevel()
-        # print(currentVolumeDb)
-        if currentVolumeDb < self.volume.GetVolumeRange()[1] - 2.0:
-            self.volume.SetMasterVolumeLevel(currentVolumeDb + 2.0, None)
-
-    def decrease_vol(self, mode):
-        """
-        Increase system's volume by specific ammount.
-        """
-        # Get current volume
-        # set_volume = min(1.0, max(0.0, mode))
-        currentVolumeDb = self.volume.GetMasterVolumeLevel()
-        # print(currentVolumeDb)
-        if currentVolumeDb > self.volume.GetVolumeRange()[0] + 2.0:
-            self.volume.SetMasterVolumeLevel(currentVolumeDb - 2.0, None)
-
-    def increase_seek(self, arg):
-        pass
-
-    def decrease_seek(self, arg):
-        pass
+        if session.control_type != tab:
+            return False
+        if test_interaction == "Volume" or test_interaction == "Seek":
+            return abs(self.experiment_values[test_interaction] - self.experiment_required) <= 10
+        return interaction == test_interaction
 
-    def scroll_up(self, arg):
-        keyboard.send("up", do_press=True, do_release=True)
-
-    def scroll_down(self, arg):
-        keyboard.send("down", do_press=True, do_release=True)
+    def on_sample(self, session, data):
+        if not self.active_status and not self.test_status:
+            self.view.publish('sample', data)
 
-    def mute(self):
-        if self.volume.GetMute() == 0:
-            self.volume.SetMute(1, None)
-        else:
-            self.volume.SetMute(0, None)
+    def render_sensor_data(self, data):
+        return [(self.gyro_x, str(data['Gyroscope']['x'])),
+                (self.gyro_y, str(data['Gyroscope']['y'])),
+                (self.gyro_z, str(data['Gyroscope']['z'])),
 
-    def ok(self):
-        keyboard.send("enter", do_press=True, do_release=True)
+                (self.acceleration_x, str(data['Accelerometer']['x'])),
+                (self.acceleration_y, str(data['Accelerometer']['y'])),
+                (self.acceleration_z, str(data['Accelerometer']['z'])),
 
-    def esc(self):
-        keyboard.send("esc", do_press=True, do_release=True)
+                (self.rotation_x, str(data['Rotation']['x'])),
+                (self.rotation_y, str(data['Rotation']['y'])),
+                (self.rotation_z, str(data['Rotation']['z']))]
 
-    def create_udp_stream(self):
-        """
-        Create a socket connection and listen to datapackets.
-        """
+    def on_warning(self, message):
+        self.ui.post(lambda: messagebox.showwarning(title='Sensor Warning', message=message))
 
-        # TODO We need to check here if we need socket.SOCK_STREAM for TCP connection
-        self.s = socket.socket(family=socket.AF_INET, type=socket.SOCK_DGRAM)
+    def on_batch(self):
+        if self.sessions:
+            self.view.publish('status', "Receiving Data")
+        self.view.publish('counters', (self.receiver.received, self.receiver.dropped, self.executor.depth, self.executor.last_latency))
 
-        # Bind the IP address and port number to socket instance
-        self.s.bind((self.host, self.port))
-
-        print("Success binding: UDP server up and listening")
-
-        self.sensor_data = threading.Thread(target=self.get_data, daemon=True) # Use daemon=True to kill thread when applications exits
-        self.sensor_data.start()
+    def render_counters(self, counters):
+        received, dropped, depth, latency = counters
+        return [(self.packets_var, str(received) + " received | " + str(dropped) + " dropped"),
+                (self.actions_var, "Queue: " + str(depth) + " | Latency: " + str(round(latency * 1000, 1)) + " ms")]
 
 if __name__ == "__main__":
-    app = Server(host='', port=50000)
-    app.window.mainloop()
\ No newline at end of file
+    parser = core.argument_parser("Sensor media control server")
+    parser.add_argument('--refresh-rate', type=float, default=20, help="Refresh rate of the sensor values and status labels (Hz)")
+    args = parser.parse_args()
+
+    app = Server(refresh_rate=args.refresh_rate, **core.server_options(args))
+    app.window.mainloop()
+    app.shutdown()
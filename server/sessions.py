@@ -0,0 +1,46 @@
+import ringbuffer
+import fusion
+import sequencer
+
+class ClientSession:
+    """
+    Connection and gesture state of a single client device. Sessions are kept by the server in a dictionary
+    keyed by the client's (ip, port) address, so every phone has its own tilt baseline, debounce timer and timeout.
+    """
+
+    __slots__ = ('address', 'received_time_history', 'active_interaction', 'gesture_samples',
+                 'control_type', 'last_action_time', 'tilt', 'samples', 'timestep', 'orientation',
+                 'step_credit', 'step_time', 'packet_time', 'interval', 'jitter', 'release_timeout',
+                 'sequencer', 'tilt_delta', 'tilt_first')
+
+    def __init__(self, address, history_size=256):
+        self.address               = address
+        self.received_time_history = 0  # Monotonic time (ns) of the latest packet
+        self.active_interaction    = ''
+        self.gesture_samples       = 0  # Samples received since the active interaction was released
+        self.control_type          = None
+        self.last_action_time      = 0  # Time (ns) of the latest debounced action on the scheduler's clock
+        self.tilt                  = None # Tilt of the active gesture, None until it is classified
+        self.tilt_delta            = (0.0, 0.0) # Filtered x,y difference of the gesture window so far
+        self.tilt_first            = None # x,y values of the first sample of the gesture window
+        self.samples               = ringbuffer.SampleRing(history_size) # Recent samples for windowed gesture detection
+        self.timestep              = None # Client timestep of the latest layout packet
+        self.orientation           = fusion.OrientationFilter() # Gyroscope and accelerometer fusion, updated on every layout packet
+        self.step_credit           = None # Fractional steps of a rate controlled action carried to the next packet
+        self.step_time             = 0  # Time (ns) the step credit was last updated on the scheduler's clock
+        self.packet_time           = None # Time (ns) of the latest packet on the scheduler's clock
+        self.interval              = 0.21 # Average packet interval (sec), the app's nominal rate until measured
+        self.jitter                = 0.0  # Average deviation of the packet interval (sec)
+        self.release_timeout       = 0.23 # Idle time (sec) after which the active interaction is released
+        self.sequencer             = sequencer.PacketSequencer() # Timestep ordering, loss and clock estimates of the layout packets
+
+    def release(self):
+        """
+        Release the active interaction, the next layout packet starts a new gesture window.
+        """
+        self.active_interaction  = ''
+        self.gesture_samples     = 0
+        self.step_credit         = None
+        self.tilt                = None
+        self.tilt_delta          = (0.0, 0.0)
+        self.control_type        = None
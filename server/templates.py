@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import protocol
+import recorder
+
+# Columns of the session's sample rows compared with the templates: gyroscope then accelerometer
+FEATURES = slice(1, 7)
+
+# Typical change of each feature during a gesture (rad/s, m/s²), dividing by it gives every feature the same weight
+SCALES = np.array([2.0, 2.0, 2.0, 4.0, 4.0, 4.0])
+
+TEMPLATES_VERSION = 1
+
+def normalize(samples, length):
+    """
+    Resample the (N, 6) gyroscope and accelerometer rows of a gesture to `length` rows by linear interpolation,
+    relative to its first row and divided by `SCALES`. Sensors that were not ready count as unchanged.
+    """
+    samples   = np.asarray(samples, dtype=np.float64)
+    position  = np.linspace(0, len(samples) - 1, length)
+    lower     = position.astype(int)
+    upper     = np.minimum(lower + 1, len(samples) - 1)
+    fraction  = (position - lower)[:, None]
+    resampled = samples[lower] * (1 - fraction) + samples[upper] * fraction
+    return np.nan_to_num((resampled - resampled[0]) / SCALES)
+
+_diagonals = {}
+
+def band_diagonals(length, band):
+    """
+    Returns the anti-diagonals of the accumulated cost matrix of `banded_dtw`, restricted to the cells within `band`
+    of the diagonal. Each is given as flat indices of its cells, of their three predecessors and of their costs.
+    """
+    key = (length, band)
+    diagonals = _diagonals.get(key)
+    if diagonals is None:
+        diagonals = []
+        width     = length + 1
+        for d in range(2, 2 * length + 1):
+            i    = np.arange(max(1, d - length), min(length, d - 1) + 1)
+            j    = d - i
+            keep = np.abs(i - j) <= band
+            i, j = i[keep], j[keep]
+            diagonals.append((i * width + j, (i - 1) * width + j - 1, (i - 1) * width + j, i * width + j - 1, (i - 1) * length + j - 1))
+        _diagonals[key] = diagonals
+    return diagonals
+
+def banded_dtw(query, templates, band):
+    """
+    Returns the dynamic time warping distance between a query and each template, with the warping path kept within
+    `band` rows of the diagonal (Sakoe-Chiba band). All the templates are computed together, one anti-diagonal of the
+    accumulated cost matrix at a time, as the cells of an anti-diagonal only depend on the two previous ones.
+
+    Parameters:
+    -----------
+        query (`ndarray`): (L, C) normalized gesture.
+        templates (`ndarray`): (K, L, C) normalized templates.
+        band (`int`): Largest shift (rows) between the query and a template.
+
+    Returns:
+    --------
+        distances (`ndarray`): (K,) root mean square cost of the best warping path of each template, comparable to
+                               the Euclidean distance (the diagonal path), which is an upper bound of it.
+    """
+    length = len(query)
+    # Cells are rows and templates columns, so every step indexes whole rows
+    cost = ((templates[:, :, None, :] - query[None, None, :, :]) ** 2).sum(axis=3).reshape(len(templates), -1).T
+    acc  = np.full(((length + 1) ** 2, len(templates)), np.inf)
+    acc[0] = 0.0
+    for cells, diagonal, up, left, costs in band_diagonals(length, band):
+        acc[cells] = cost[costs] + np.minimum(np.minimum(acc[diagonal], acc[up]), acc[left])
+    return np.sqrt(acc[-1] / length)
+
+def lower_bounds(query, templates, band):
+    """
+    Returns a lower bound of the `banded_dtw` distance of each template (LB_Keogh): the distance of the template to
+    the envelope of the query, its minimum and maximum over `band` rows around each row, in a single pass.
+    """
+    length  = len(query)
+    padded  = np.pad(query, ((band, band), (0, 0)), mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * band + 1, axis=0)
+    excess  = (templates - np.clip(templates, windows.min(axis=2), windows.max(axis=2))).reshape(len(templates), -1)
+    return np.sqrt(np.einsum('ij,ij->i', excess, excess) / length)
+
+class TemplateRecognizer:
+    """
+    Recognizes gestures recorded by the user, each mapped to an action. The samples of the current gesture are
+    compared with a banded DTW, which tolerates a gesture made faster or slower than its template. A lower bound of
+    the distance to every template is computed first in one vectorized operation, and only the `candidates` closest
+    templates whose bound is within the threshold are compared with the DTW. The cost per packet is bounded by
+    `max_samples`, `length` and `candidates`, whatever the number of templates.
+
+    Templates are kept in a JSON file, which is read again when it changes, so templates added with this module's
+    command line while the server runs are recognized without a restart.
+    """
+
+    def __init__(self, path='./server/templates.json', length=16, band=3, candidates=8, threshold=0.35,
+                 min_samples=4, max_samples=64, reload_interval=1.0):
+        self.path            = path
+        self.length          = length
+        self.band            = band
+        self.candidates      = candidates
+        self.threshold       = threshold
+        self.min_samples     = min_samples
+        self.max_samples     = max_samples
+        self.reload_interval = reload_interval
+
+        self.templates = {} # Name to (action, (N, 6) raw samples)
+        self.index     = ([], [], np.zeros((0, length, 6))) # Names, actions and normalized templates, replaced at once
+        self.loaded    = None # Modification time (ns) of the file when it was read
+        self.checked   = 0    # Monotonic time (ns) the file was last checked
+        self.load()
+
+    def load(self):
+        try:
+            stat = os.stat(self.path)
+            with open(self.path) as templates_file:
+                templates = json.load(templates_file)['templates']
+        except (OSError, ValueError, KeyError):
+            return
+        self.templates = {name: (template['action'], np.array(template['samples'], dtype=np.float64))
+                          for name, template in templates.items()}
+        self.loaded = stat.st_mtime_ns
+        self.rebuild()
+
+    def save(self):
+        # Written to a temporary file first so a running server never reads a truncated file
+        templates = {name: {'action': action, 'samples': samples.tolist()} for name, (action, samples) in self.templates.items()}
+        with open(self.path + '.tmp', 'w') as templates_file:
+            json.dump({'version': TEMPLATES_VERSION, 'templates': templates}, templates_file)
+        os.replace(self.path + '.tmp', self.path)
+        self.loaded = os.stat(self.path).st_mtime_ns
+
+    def rebuild(self):
+        names = sorted(self.templates)
+        self.index = (names, [self.templates[name][0] for name in names],
+                      np.array([normalize(self.templates[name][1], self.length) for name in names]).reshape(len(names), self.length, 6))
+
+    def add(self, name, action, samples):
+        """
+        Add or replace a template.
+
+        Parameters:
+        -----------
+            name (`str`): Name of the template.
+            action (`str`): Action run when the template is recognized, a key of the server's ACTIONS.
+            samples (`ndarray`): (N, 6) gyroscope and accelerometer values of the recorded gesture.
+
+        Returns:
+        --------
+            None
+        """
+        self.templates[name] = (action, np.asarray(samples, dtype=np.float64))
+        self.rebuild()
+
+    def remove(self, name):
+        self.templates.pop(name, None)
+        self.rebuild()
+
+    def refresh(self):
+        """
+        Read the file again if it changed, checking it at most every `reload_interval` seconds.
+        """
+        now = time.monotonic_ns()
+        if now - self.checked < self.reload_interval * 1e9:
+            return
+        self.checked = now
+        try:
+            modified = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return
+        if modified != self.loaded:
+            self.load()
+
+    def match(self, window):
+        """
+        Returns the template closest to a gesture as (name, action, distance), or None when no template is within
+        `threshold` or the gesture is still shorter than `min_samples`.
+
+        Parameters:
+        -----------
+            window (`ndarray`): (N, 10) sample rows of the gesture as stored by `SampleRing`, oldest first.
+        """
+        self.refresh()
+        names, actions, index = self.index
+        if not names or len(window) < self.min_samples:
+            return None
+
+        # Only the templates whose lower bound is within the threshold can match, the DTW is skipped for the others
+        query   = normalize(np.asarray(window)[-self.max_samples:, FEATURES], self.length)
+        bounds  = lower_bounds(query, index, self.band)
+        nearest = np.flatnonzero(bounds <= self.threshold)
+        if len(nearest) == 0:
+            return None
+        if len(nearest) > self.candidates:
+            nearest = nearest[np.argpartition(bounds[nearest], self.candidates)[:self.candidates]]
+
+        distances = banded_dtw(query, index[nearest], self.band)
+        best      = np.argmin(distances)
+        if distances[best] > self.threshold:
+            return None
+        return names[nearest[best]], actions[nearest[best]], float(distances[best])
+
+def log_gestures(log, gap=0.5):
+    """
+    Split the layout packets of a session log into gestures: the samples of one client on one screen region without
+    a pause longer than `gap` seconds.
+
+    Returns:
+    --------
+        gestures (`list`): Tuples of (client address, region, duration in sec, (N, 9) sample values).
+    """
+    gestures = []
+    current  = {} # Latest gesture of every address as [region, first time, last time, rows]
+    for received_time, message, address in log:
+        packet = protocol.decode_packet(bytes(message))
+        if packet is None or packet[0] != protocol.LAYOUT:
+            continue
+        data    = packet[1]
+        gesture = current.get(address)
+        if gesture is None or gesture[0] != data['Action'] or received_time - gesture[2] > gap * 1e9:
+            gesture = current[address] = [data['Action'], received_time, received_time, []]
+            gestures.append((address, gesture))
+        gesture[2] = received_time
+        gesture[3].append(protocol.sample_values(data))
+    return [(address, region, (last - first) / 1e9, np.array(rows)) for address, (region, first, last, rows) in gestures]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the gesture templates, a running server picks the changes up")
+    parser.add_argument('--templates', default='./server/templates.json', help="Templates file")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="List the templates")
+    gestures_parser = commands.add_parser('gestures', help="List the gestures of a session log")
+    gestures_parser.add_argument('log', help="Session log written with --record")
+    add_parser = commands.add_parser('add', help="Add a gesture of a session log as a template")
+    add_parser.add_argument('name', help="Template name")
+    add_parser.add_argument('action', help="Action of the template, e.g. Next or Volume+")
+    add_parser.add_argument('log', help="Session log written with --record")
+    add_parser.add_argument('--gesture', type=int, default=-1, help="Index of the gesture in the log, the last one by default")
+    remove_parser = commands.add_parser('remove', help="Remove a template")
+    remove_parser.add_argument('name', help="Template name")
+    args = parser.parse_args()
+
+    recognizer = TemplateRecognizer(args.templates)
+    if args.command == 'list':
+        for name, (action, samples) in sorted(recognizer.templates.items()):
+            print(name.ljust(20) + action.ljust(14) + str(len(samples)) + " samples")
+    elif args.command == 'gestures':
+        log = recorder.SessionLog(args.log)
+        for index, (address, region, duration, rows) in enumerate(log_gestures(log)):
+            print(str(index).rjust(4) + "  " + address[0] + ":" + str(address[1]) + "  " + region + "  " +
+                  str(len(rows)) + " samples  " + str(round(duration, 2)) + " s")
+        log.close()
+    elif args.command == 'add':
+        log = recorder.SessionLog(args.log)
+        address, region, duration, rows = log_gestures(log)[args.gesture]
+        log.close()
+        recognizer.add(args.name, args.action, rows[:, :6])
+        recognizer.save()
+        print("Template " + args.name + " (" + args.action + ") added from " + str(len(rows)) + " samples")
+    elif args.command == 'remove':
+        recognizer.remove(args.name)
+        recognizer.save()
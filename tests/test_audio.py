@@ -0,0 +1,60 @@
+import audio
+
+def test_step_sets_the_level_once_per_step():
+    endpoint = audio.FakeEndpoint(level=-20.0)
+    volume   = audio.CachedVolume(endpoint)
+
+    assert volume.step(2.0) == -18.0
+    assert volume.step(2.0) == -16.0
+    assert endpoint.level == -16.0
+    assert endpoint.calls['set_level'] == 2
+    # The range is read once and the level is not read back within a burst of steps
+    assert endpoint.calls['get_range'] == 1
+    assert endpoint.calls['get_level'] == 1
+
+def test_step_clamps_to_the_endpoint_range():
+    endpoint = audio.FakeEndpoint(minimum=-65.25, maximum=0.0, level=-1.0)
+    volume   = audio.CachedVolume(endpoint)
+
+    assert volume.step(10.0) == 0.0
+    assert volume.step(10.0) == 0.0
+    assert endpoint.calls['set_level'] == 1
+
+    assert volume.step(-100.0) == -65.25
+    assert endpoint.level == -65.25
+
+def test_outside_change_is_read_back_after_a_pause():
+    endpoint = audio.FakeEndpoint(level=-20.0)
+    volume   = audio.CachedVolume(endpoint, idle_interval=0.0)
+
+    volume.step(2.0)
+    endpoint.level = -40.0 # Changed from the system mixer
+    assert volume.step(2.0) == -38.0
+
+def test_outside_change_is_overwritten_within_the_resync_interval():
+    endpoint = audio.FakeEndpoint(level=-20.0)
+    volume   = audio.CachedVolume(endpoint, resync_interval=3600.0, idle_interval=3600.0)
+
+    volume.step(2.0)
+    endpoint.level = -40.0
+    # Within the resync interval a step starts from the cached level
+    assert volume.step(2.0) == -16.0
+    assert endpoint.level == -16.0
+
+def test_invalidate_reads_the_level_back():
+    endpoint = audio.FakeEndpoint(level=-20.0)
+    volume   = audio.CachedVolume(endpoint, resync_interval=3600.0, idle_interval=3600.0)
+
+    volume.step(2.0)
+    endpoint.level = -40.0
+    volume.invalidate()
+    assert volume.step(2.0) == -38.0
+
+def test_toggle_mute_tracks_the_endpoint():
+    endpoint = audio.FakeEndpoint(mute=False)
+    volume   = audio.CachedVolume(endpoint)
+
+    assert volume.toggle_mute() is True
+    assert endpoint.mute is True
+    assert volume.toggle_mute() is False
+    assert endpoint.calls['get_mute'] == 1
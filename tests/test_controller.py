@@ -0,0 +1,39 @@
+import time
+
+import core
+import protocol
+import replay
+
+ADDRESS = ('10.0.0.2', 4000)
+
+def packet(index):
+    return protocol.encode_layout_packet(120000.0 + index * 0.2, 'TS', (0, 0, 0), (-0.5 * index, 0, 9.8), (0, 0, 0))
+
+def pipeline():
+    # The packet pipeline without a socket, as a replay runs it
+    server = core.ControlServer('127.0.0.1', 0, backend='recording')
+    server.reset_connection()
+    server.receiver = replay.ReplayCounters()
+    return server
+
+def test_a_gesture_after_a_pause_wakes_the_controller():
+    server = pipeline()
+    now    = time.monotonic_ns()
+    server.handle_batch([(packet(0), ADDRESS)], now)
+
+    # Once the paused session is waiting, the controller sleeps until it disconnects. A new gesture is released long before
+    server.controller_deadline = now + server.DISCONNECT_TIMEOUT * core.NS
+    server.controller_wakeup.clear()
+    server.handle_batch([(packet(1), ADDRESS)], now + 2 * server.WAITING_TIMEOUT * core.NS)
+    assert server.controller_wakeup.is_set()
+
+def test_packets_pushing_the_release_later_do_not_wake_the_controller():
+    server = pipeline()
+    now    = time.monotonic_ns()
+    server.handle_batch([(packet(0), ADDRESS)], now)
+
+    session = server.sessions[ADDRESS]
+    server.controller_deadline = now + round(session.release_timeout * core.NS)
+    server.controller_wakeup.clear()
+    server.handle_batch([(packet(1), ADDRESS)], now + core.NS // 5)
+    assert not server.controller_wakeup.is_set()
@@ -0,0 +1,71 @@
+import time
+
+import executor
+
+def run(actions, calls, timeout=5.0):
+    # Start the worker on the queued actions and wait for `calls` calls
+    actions.start()
+    deadline = time.monotonic() + timeout
+    while actions.calls < calls and time.monotonic() < deadline:
+        time.sleep(0.001)
+    actions.stop()
+    return actions.calls
+
+class Calls:
+    def __init__(self):
+        self.made = []
+
+    def action(self, name):
+        return lambda count=1: self.made.append((name, count))
+
+def test_repeated_coalescable_actions_are_merged_into_one_call():
+    calls   = Calls()
+    actions = executor.ActionExecutor(coalescable=('Volume+',))
+    for _ in range(3):
+        actions.submit('Volume+', calls.action('Volume+'))
+    actions.submit('Next', calls.action('Next'))
+    actions.submit('Volume+', calls.action('Volume+'), count=2)
+
+    # Only an action still waiting at the end of the queue is merged into
+    assert [entry[2] for entry in actions.pending] == [3, 1, 2]
+    assert run(actions, 3) == 3
+    assert calls.made == [('Volume+', 3), ('Next', 1), ('Volume+', 2)]
+    assert (actions.submitted, actions.coalesced, actions.executed) == (5, 2, 6)
+
+def test_other_actions_are_never_merged():
+    actions = executor.ActionExecutor(coalescable=('Volume+',))
+    actions.submit('Next', lambda: None)
+    actions.submit('Next', lambda: None)
+    assert actions.depth == 2
+
+    dropping = executor.ActionExecutor(policy=executor.DROP_OLDEST, coalescable=('Volume+',))
+    dropping.submit('Volume+', lambda: None)
+    dropping.submit('Volume+', lambda: None)
+    assert (dropping.depth, dropping.coalesced) == (2, 0)
+
+def test_full_queue_drops_the_oldest_action():
+    calls   = Calls()
+    actions = executor.ActionExecutor(maxsize=2, policy=executor.DROP_OLDEST)
+    for name in ('Previous', 'Next', 'OK'):
+        actions.submit(name, calls.action(name))
+
+    assert (actions.depth, actions.dropped, actions.max_depth) == (2, 1, 2)
+    run(actions, 2)
+    assert calls.made == [('Next', 1), ('OK', 1)]
+
+def test_unbounded_queue_keeps_every_action():
+    actions = executor.ActionExecutor(maxsize=None, policy=executor.DROP_OLDEST)
+    for _ in range(1000):
+        actions.submit('Next', lambda: None)
+    assert (actions.depth, actions.dropped) == (1000, 0)
+
+def test_failing_action_does_not_stop_the_worker(capsys):
+    calls   = Calls()
+    actions = executor.ActionExecutor()
+    actions.submit('Mute', lambda: 1 / 0)
+    actions.submit('Next', calls.action('Next'))
+
+    run(actions, 2)
+    assert actions.failed == 1
+    assert calls.made == [('Next', 1)]
+    assert 'ZeroDivisionError' in capsys.readouterr().err
@@ -0,0 +1,30 @@
+import math
+
+import pytest
+
+import core
+import gestures
+import sessions
+
+def rotation_vector(angle):
+    # Unit quaternion of a rotation of `angle` about x, without its w part
+    return (math.sin(angle / 2), 0.0, 0.0)
+
+def test_rotation_angle_is_the_turn_between_two_rotation_vectors():
+    assert gestures.rotation_angle(rotation_vector(0.1), rotation_vector(0.4)) == pytest.approx(0.3)
+    assert gestures.rotation_angle(rotation_vector(0.4), rotation_vector(0.4)) == pytest.approx(0.0, abs=1e-6)
+
+def test_angles_are_zero_when_a_sensor_was_not_ready():
+    assert gestures.rotation_angle((math.nan,) * 3, rotation_vector(0.4)) == 0.0
+    assert gestures.tilt_angle((math.nan,) * 3, (0.0, 0.0, 9.8)) == 0.0
+
+@pytest.mark.parametrize("sensor, steps", [("Rotation", 2), ("Accelerometer", 1), ("Template", 1)])
+def test_action_steps_follow_the_sensor_of_the_region(sensor, steps):
+    server  = core.ControlServer('127.0.0.1', 0, backend='recording')
+    session = sessions.ClientSession(('10.0.0.2', 4000))
+    # The phone turns 0.35 rad according to the rotation vector, the accelerometer does not move
+    session.samples.append(0.0, (0, 0, 0, 0, 0, 9.8, *rotation_vector(0.0)))
+    session.samples.append(0.1, (0, 0, 0, 0, 0, 9.8, *rotation_vector(0.35)))
+    session.gesture_samples = 2
+
+    assert server.action_steps(session, "Incremental", sensor) == steps
@@ -0,0 +1,59 @@
+import math
+
+import pytest
+
+import protocol
+
+GYROSCOPE     = (0.5, -1.25, 2.0)
+ACCELEROMETER = (0.0, 0.25, 9.75)
+
+def test_binary_layout_packet_is_decoded():
+    message = protocol.encode_layout_packet(142305.25, 'TS', GYROSCOPE, ACCELEROMETER, None)
+    assert len(message) == protocol.LAYOUT_PACKET.size
+
+    control_type, data = protocol.decode_packet(message)
+    assert control_type == protocol.LAYOUT
+    assert data['Timestep'] == 142305.25
+    assert data['Action'] == 'TS'
+    assert data['Gyroscope'] == dict(zip('xyz', GYROSCOPE))
+    assert data['Accelerometer'] == dict(zip('xyz', ACCELEROMETER))
+    assert data['Rotation'] == dict.fromkeys('xyz', protocol.NOT_READY)
+
+def test_text_packets_are_decoded():
+    control_type, data = protocol.decode_packet(protocol.encode_text_packet(142305, 'LS', GYROSCOPE, ACCELEROMETER, None))
+    assert control_type == protocol.LAYOUT
+    assert (data['Timestep'], data['Action']) == (142305.0, 'LS')
+    assert data['Accelerometer'] == dict(zip('xyz', ACCELEROMETER))
+    assert data['Rotation'] == dict.fromkeys('xyz', protocol.NOT_READY)
+
+    assert protocol.decode_packet(b'Next') == (protocol.REMOTE, ['Next'])
+
+def test_sensors_not_ready_are_sampled_as_nan():
+    _, data = protocol.decode_packet(protocol.encode_layout_packet(142305.25, 'TS', GYROSCOPE, ACCELEROMETER, None))
+    values  = protocol.sample_values(data)
+    assert values[:6] == [*GYROSCOPE, *ACCELEROMETER]
+    assert all(math.isnan(value) for value in values[6:])
+
+@pytest.mark.parametrize("size", [0, 2, 20, protocol.LAYOUT_PACKET.size - 1])
+def test_truncated_binary_packets_are_dropped(size):
+    message = protocol.encode_layout_packet(142305.25, 'TS', GYROSCOPE, ACCELEROMETER, ACCELEROMETER)
+    assert protocol.decode_packet(message[:size]) is None
+
+def test_truncated_text_packets_are_dropped():
+    message = protocol.encode_text_packet(142305, 'TS', GYROSCOPE, ACCELEROMETER, ACCELEROMETER)
+    assert protocol.decode_packet(message[:20]) is None
+    assert protocol.decode_packet(message.replace(b'9.75', b'9.7x')) is None
+
+@pytest.mark.parametrize("header", [b'XM', b'SX', b'\xff\xfe'])
+def test_binary_packets_with_a_bad_magic_are_dropped(header):
+    message = protocol.encode_layout_packet(142305.25, 'TS', GYROSCOPE, ACCELEROMETER, ACCELEROMETER)
+    assert protocol.decode_packet(header + message[2:]) is None
+
+def test_binary_packets_of_another_version_are_dropped():
+    message = bytearray(protocol.encode_layout_packet(142305.25, 'TS', GYROSCOPE, ACCELEROMETER, ACCELEROMETER))
+    message[2] = protocol.PACKET_VERSION + 1
+    assert protocol.decode_packet(bytes(message)) is None
+
+def test_timesteps_are_seconds_since_midnight():
+    assert protocol.timestep_seconds(142305.25) == 14 * 3600 + 23 * 60 + 5.25
+    assert protocol.timestep_seconds(0.5) == 0.5
@@ -0,0 +1,58 @@
+import os
+import time
+
+import core
+import protocol
+import recorder
+import replay
+
+SETTINGS = os.path.join(os.path.dirname(os.path.abspath(core.__file__)), 'settings.json')
+ADDRESS  = ('10.0.0.2', 4000)
+START    = 120000.0 # Phone's time of day, 12:00:00
+
+def record(path, gestures, interval=0.2, pause=2.0):
+    # Session log of tilts to the right on the top region, one per entry of `gestures` with that many packets
+    # `interval` seconds apart, and `pause` seconds between gestures
+    log      = recorder.SessionRecorder(str(path))
+    received = 10 * core.NS
+    sent     = START
+    for samples in gestures:
+        for index in range(samples):
+            message = protocol.encode_layout_packet(sent, 'TS', (0, 0, 0), (-0.5 * index, 0, 9.8), (0, 0, 0))
+            log.write_batch([(message, ADDRESS)], received)
+            received += round(interval * core.NS)
+            sent     += interval
+        received += round(pause * core.NS)
+        sent     += pause
+    log.close()
+
+def replay_log(path):
+    server = core.ControlServer(host='', port=0, action_queue=None, backend='recording', settings_path=SETTINGS, active=True)
+    server.executor.start()
+    log = recorder.SessionLog(str(path))
+    try:
+        replayed = replay.replay(server, log)
+        deadline = time.monotonic() + 5
+        while server.executor.calls < server.executor.submitted - server.executor.coalesced and time.monotonic() < deadline:
+            time.sleep(0.001)
+    finally:
+        server.shutdown()
+        log.close()
+    return replayed, server
+
+def test_held_tilt_repeats_its_action(tmp_path):
+    record(tmp_path / 'session.log', [10])
+    replayed, server = replay_log(tmp_path / 'session.log')
+
+    # Tilt Right of the top region is Next: once when it is recognized, then repeated while held for 1.8 sec
+    assert replayed == 10
+    assert [action[1:] for action in server.output.actions] == [('key', 'right')] * 5
+    assert server.executor.dropped == 0
+
+def test_gestures_after_a_pause_are_recognized_again(tmp_path):
+    record(tmp_path / 'session.log', [3, 3, 3])
+    replayed, server = replay_log(tmp_path / 'session.log')
+
+    assert replayed == 9
+    assert len(server.output.actions) == 3
+    assert server.receiver.malformed == 0
@@ -0,0 +1,72 @@
+import pytest
+
+import scheduler
+import sessions
+
+NS = 1000000000
+
+def gesture_session():
+    session = sessions.ClientSession(('10.0.0.2', 4000))
+    session.gesture_samples = 1
+    return session
+
+def feed(timing, session, intervals, start=0):
+    time = start
+    timing.observe(session, time)
+    for interval in intervals:
+        time += round(interval * NS)
+        timing.observe(session, time)
+    return time
+
+def test_steady_packets_tighten_the_release_timeout():
+    timing  = scheduler.AdaptiveScheduler()
+    session = gesture_session()
+    feed(timing, session, [0.1] * 100)
+
+    assert session.interval == pytest.approx(0.1, rel=1e-3)
+    assert session.jitter == pytest.approx(0.0, abs=1e-3)
+    # Without jitter the margin of the interval is left to spare
+    assert session.release_timeout == pytest.approx(0.11, rel=1e-2)
+
+def test_jittery_packets_widen_the_release_timeout():
+    timing = scheduler.AdaptiveScheduler()
+    steady, jittery = gesture_session(), gesture_session()
+    feed(timing, steady, [0.2] * 100)
+    feed(timing, jittery, [0.1, 0.3] * 50)
+
+    assert jittery.interval == pytest.approx(steady.interval, rel=0.1)
+    assert jittery.release_timeout > steady.release_timeout + 0.2
+
+def test_release_timeout_stays_within_its_bounds():
+    timing = scheduler.AdaptiveScheduler(minimum=0.05, maximum=1.0)
+    fast, slow = gesture_session(), gesture_session()
+    feed(timing, fast, [0.01] * 100)
+    feed(timing, slow, [0.25, 0.95] * 50)
+
+    assert fast.release_timeout == 0.05
+    assert slow.release_timeout == 1.0
+
+def test_intervals_outside_a_gesture_are_not_measured():
+    timing  = scheduler.AdaptiveScheduler()
+    session = sessions.ClientSession(('10.0.0.2', 4000))
+    last    = feed(timing, session, [0.05] * 10)
+
+    assert session.packet_time == last
+    assert (session.interval, session.release_timeout) == (0.21, 0.23)
+
+@pytest.mark.parametrize("interval", [0.0, 1.0, 5.0])
+def test_batched_packets_and_pauses_are_not_measured(interval):
+    timing  = scheduler.AdaptiveScheduler(maximum=1.0)
+    session = gesture_session()
+    feed(timing, session, [interval])
+    assert (session.interval, session.jitter) == (0.21, 0.0)
+
+def test_repeat_is_due_at_the_packet_closest_to_the_period():
+    timing  = scheduler.AdaptiveScheduler()
+    session = gesture_session()
+    session.interval         = 0.2
+    session.last_action_time = 10 * NS
+
+    # Repeating every 0.5 sec, the packet 0.4 sec later is closer to the repeat time than the one 0.6 sec later
+    assert not timing.repeat_due(session, 0.5, 10 * NS + round(0.3 * NS))
+    assert timing.repeat_due(session, 0.5, 10 * NS + round(0.4 * NS))
@@ -0,0 +1,88 @@
+import pytest
+
+import protocol
+import sequencer
+
+START = 120000.0 # 12:00:00, as sent by the phone
+
+def packet(offset, x=0.0):
+    # Layout packet sent `offset` seconds after START, within the same minute
+    return protocol.decode_packet(protocol.encode_layout_packet(START + offset, 'TS', (0, 0, 0), (x, 0, 9.8), (0, 0, 0)))[1]
+
+def received(offset, transit=0.05):
+    # Server's time of day when a packet sent at `offset` arrives
+    return 12 * 3600 + offset + transit
+
+def test_packets_in_order_are_accepted():
+    packets = sequencer.PacketSequencer()
+    for index in range(5):
+        assert packets.accept(packet(index * 0.2), received(index * 0.2), 0.2)
+    assert packets.stats()['accepted'] == 5
+    assert packets.fine
+
+def test_reordered_packet_is_dropped_and_not_counted_as_lost():
+    packets = sequencer.PacketSequencer()
+    assert packets.accept(packet(0.0), received(0.0), 0.2)
+    assert packets.accept(packet(0.4), received(0.4), 0.2)
+    assert packets.lost == 1
+
+    assert not packets.accept(packet(0.2), received(0.45), 0.2)
+    assert (packets.reordered, packets.lost, packets.accepted) == (1, 0, 2)
+
+def test_duplicate_packet_is_dropped():
+    packets = sequencer.PacketSequencer()
+    assert packets.accept(packet(0.0), received(0.0))
+    assert not packets.accept(packet(0.0), received(0.01))
+    assert packets.duplicates == 1
+
+    # Text packets only carry whole seconds, a new sample within the same second is not a duplicate
+    assert packets.accept(packet(0.0, x=1.0), received(0.2))
+    assert packets.accepted == 2
+
+@pytest.mark.parametrize("interval, lost", [(0.2, 3), (None, 0)])
+def test_gap_counts_the_packets_lost_within_a_gesture(interval, lost):
+    packets = sequencer.PacketSequencer()
+    packets.accept(packet(0.0), received(0.0), interval)
+    packets.accept(packet(0.8), received(0.8), interval)
+    assert packets.lost == lost
+    assert packets.stats()['loss_rate'] == pytest.approx(lost / (lost + 2))
+
+def test_whole_second_timesteps_do_not_count_losses():
+    packets = sequencer.PacketSequencer()
+    packets.accept(packet(0.0), received(0.0), 0.2)
+    packets.accept(packet(2.0), received(2.0), 0.2)
+    assert not packets.fine
+    assert packets.lost == 0
+
+def test_transit_times_give_the_clock_offset_and_jitter():
+    packets = sequencer.PacketSequencer()
+    packets.accept(packet(0.0), received(0.0, transit=0.07), 0.2)
+    packets.accept(packet(0.2), received(0.2, transit=0.05), 0.2)
+    assert packets.offset == pytest.approx(0.05)
+    # RFC 3550: the jitter moves 1/16 of the way towards each transit difference
+    assert packets.jitter == pytest.approx(0.02 / 16)
+
+    for index in range(2, 200):
+        packets.accept(packet(index * 0.2), received(index * 0.2, transit=0.07 if index % 2 else 0.05), 0.2)
+    assert packets.jitter == pytest.approx(0.02, rel=1e-3)
+
+    # A steady network has no jitter
+    steady = sequencer.PacketSequencer()
+    for index in range(10):
+        steady.accept(packet(index * 0.2), received(index * 0.2), 0.2)
+    assert steady.jitter == pytest.approx(0.0, abs=1e-9)
+
+def test_clock_change_of_the_phone_starts_over():
+    packets = sequencer.PacketSequencer()
+    packets.accept(packet(50.0), received(50.0))
+    assert packets.accept(packet(0.0), received(60.0))
+    assert packets.reordered == 0
+    assert packets.offset == pytest.approx(60.0 + 0.05)
+
+def test_time_of_day_rolls_over_at_midnight():
+    packets = sequencer.PacketSequencer()
+    before  = protocol.decode_packet(protocol.encode_layout_packet(235959.9, 'TS', (0, 0, 0), (0, 0, 9.8), (0, 0, 0)))[1]
+    after   = protocol.decode_packet(protocol.encode_layout_packet(0.1, 'TS', (0, 0, 0), (0, 0, 9.8), (0, 0, 0)))[1]
+    assert packets.accept(before, 86399.95, 0.2)
+    assert packets.accept(after, 0.15, 0.2)
+    assert packets.lost == 0
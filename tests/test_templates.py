@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import ringbuffer
+import templates
+
+def naive_dtw(query, template, band):
+    # Textbook O(L²) dynamic time warping within `band` of the diagonal, with the same cost and scale as banded_dtw
+    length = len(query)
+    acc    = np.full((length + 1, length + 1), np.inf)
+    acc[0, 0] = 0.0
+    for i in range(1, length + 1):
+        for j in range(max(1, i - band), min(length, i + band) + 1):
+            cost = ((template[i - 1] - query[j - 1]) ** 2).sum()
+            acc[i, j] = cost + min(acc[i - 1, j - 1], acc[i - 1, j], acc[i, j - 1])
+    return np.sqrt(acc[length, length] / length)
+
+def random_gestures(count, length=16, seed=0):
+    # Smooth random walks, like normalized sensor traces
+    rng = np.random.default_rng(seed)
+    return np.cumsum(rng.normal(0, 0.3, (count, length, 6)), axis=1)
+
+@pytest.mark.parametrize("band", [0, 1, 3, 15])
+def test_banded_dtw_matches_the_naive_dtw(band):
+    query, *others = random_gestures(9, seed=band)
+    others = np.array(others)
+
+    expected = [naive_dtw(query, template, band) for template in others]
+    assert templates.banded_dtw(query, others, band) == pytest.approx(expected)
+
+def test_dtw_is_at_most_the_euclidean_distance():
+    query, *others = random_gestures(9, seed=1)
+    others    = np.array(others)
+    euclidean = np.sqrt(((others - query) ** 2).sum(axis=(1, 2)) / len(query))
+
+    assert templates.banded_dtw(query, others, 0) == pytest.approx(euclidean)
+    assert np.all(templates.banded_dtw(query, others, 3) <= euclidean + 1e-9)
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("band", [1, 3, 5])
+def test_lb_keogh_is_a_lower_bound_of_the_dtw(seed, band):
+    query, *others = random_gestures(33, seed=seed)
+    others = np.array(others)
+
+    assert np.all(templates.lower_bounds(query, others, band) <= templates.banded_dtw(query, others, band) + 1e-9)
+
+def sample_rows(gyroscope, accelerometer):
+    # (N, 10) rows as stored by SampleRing
+    rows = np.zeros((len(gyroscope), ringbuffer.COLUMNS))
+    rows[:, ringbuffer.GYROSCOPE]     = gyroscope
+    rows[:, ringbuffer.ACCELEROMETER] = accelerometer
+    return rows
+
+def test_recognizer_matches_a_gesture_made_slower_than_its_template(tmp_path):
+    recognizer = templates.TemplateRecognizer(str(tmp_path / 'templates.json'))
+    turn   = np.linspace(0, 1, 12)
+    circle = np.column_stack([np.sin(2 * np.pi * turn), np.cos(2 * np.pi * turn), turn, 3 * turn, np.zeros(12), 9.8 - turn])
+    shake  = np.column_stack([np.sign(np.sin(6 * np.pi * turn)) * 2, np.zeros((12, 2)), np.zeros(12), 4 * turn, np.full(12, 9.8)])
+    recognizer.add('circle', 'Next', circle)
+    recognizer.add('shake', 'Mute', shake)
+
+    slower = np.linspace(0, 1, 20)
+    gesture = np.column_stack([np.sin(2 * np.pi * slower), np.cos(2 * np.pi * slower), slower, 3 * slower, np.zeros(20), 9.8 - slower])
+    name, action, distance = recognizer.match(sample_rows(gesture[:, :3], gesture[:, 3:]))
+    assert (name, action) == ('circle', 'Next')
+    assert distance < recognizer.threshold
+
+    # Holding the phone still matches nothing, neither does a gesture shorter than min_samples
+    still = np.tile([0, 0, 0, 0, 0, 9.8], (20, 1))
+    assert recognizer.match(sample_rows(still[:, :3], still[:, 3:])) is None
+    assert recognizer.match(sample_rows(gesture[:3, :3], gesture[:3, 3:])) is None